@@ -1,50 +1,158 @@
 # scripts/generate_sample_data.py
-# ... (imports)
+"""Write a synthetic sales extract in the layout ``DataLoader`` expects."""
+
+from __future__ import annotations
+
+import argparse
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pacsv
+
+STATES = [
+    "AL", "AZ", "AR", "CA", "CO", "CT", "FL", "GA", "HI", "ID", "IL", "IN", "IA",
+    "KS", "KY", "LA", "ME", "MD", "MA", "MI", "MN", "MS", "MO", "NE", "NV", "NJ",
+    "NM", "NY", "NC", "ND", "OH", "OK", "PA", "RI", "SC", "SD", "TN", "TX", "UT",
+    "VT", "VA", "WA", "WV", "WI", "WY",
+]
+
+COLUMNS = [
+    "date", "invoice_number", "invoice_date", "total_amount", "customer_name",
+    "street_address", "city", "state", "zip_code", "sales_channel",
+]
 
-def generate_synthetic_sales_data(...): # Args same as before
-    # ... (setup fake, states, dates)
-    sales_channels = ['Direct', 'Web', 'Amazon-FBA', 'Retail', 'Etsy', 'Wholesale']
-    channel_weights = [0.4, 0.3, 0.1, 0.1, 0.05, 0.05]
 
-    data = []
-    for i in range(num_records):
-        # ... (generate date, customer, address, state, zip)
-
-        # Generate amount, include occasional returns/credits (e.g., 5% chance)
-        is_return = random.random() < 0.05
-        amount = round(random.uniform(min_amount, max_amount), 2)
-        if is_return:
-            amount = -abs(amount) # Make it negative
-
-        # Generate unique enough invoice number
-        invoice_num = f"INV-{random.randint(10000, 99999)}-{i}"
-        if is_return:
-            invoice_num = f"CREDIT-{invoice_num}" # Optional: indicate credit memo
-
-        # Select sales channel
-        channel = np.random.choice(sales_channels, p=channel_weights)
-
-        data.append({
-            'date': trans_date.strftime('%Y-%m-%d %H:%M:%S'),
-            'invoice_number': invoice_num,
-            'invoice_date': invoice_date.strftime('%Y-%m-%d'),
-            'total_amount': amount, # Now includes negative values
-            'customer_name': customer_name,
-            'street_address': address,
-            'city': city,
-            'state': state,
-            'zip_code': zip_code,
-            'sales_channel': channel # Added channel
+def _identity_pool(size: int, rng: np.random.Generator, seed: int | None) -> pd.DataFrame:
+    """
+    ``size`` customer identities (name, street, city) to sample rows from.
+
+    Uses Faker when installed; otherwise builds plausible values from small
+    word lists so the script has no extra dependency.
+    """
+    try:
+        from faker import Faker
+    except ImportError:
+        first = np.array(["Ava", "Ben", "Cora", "Dev", "Eli", "Faye", "Gus", "Hana", "Ivan", "Jade"])
+        last = np.array(["Smith", "Lee", "Patel", "Garcia", "Kim", "Brown", "Nguyen", "Jones", "Cole", "Diaz"])
+        streets = np.array(["Main St", "Oak Ave", "Pine Rd", "Maple Dr", "Cedar Ln", "Elm St", "Lake Blvd"])
+        cities = np.array(["Springfield", "Riverton", "Fairview", "Georgetown", "Salem", "Madison", "Clinton"])
+        return pd.DataFrame({
+            "customer_name": np.char.add(np.char.add(rng.choice(first, size), " "), rng.choice(last, size)),
+            "street_address": np.char.add(
+                np.char.add(rng.integers(1, 9999, size).astype(str), " "), rng.choice(streets, size)
+            ),
+            "city": rng.choice(cities, size),
         })
-        # ... (progress print)
 
-    df = pd.DataFrame(data)
+    fake = Faker("en_US")
+    if seed is not None:
+        fake.seed_instance(seed)
+    return pd.DataFrame({
+        "customer_name": [fake.name() for _ in range(size)],
+        "street_address": [fake.street_address() for _ in range(size)],
+        "city": [fake.city() for _ in range(size)],
+    })
+
+
+def generate_synthetic_sales_data(
+    num_records: int = 50_000,
+    start_date: str = "2021-01-01",
+    end_date: str = "2024-12-31",
+    min_amount: float = 5.0,
+    max_amount: float = 2_500.0,
+    return_rate: float = 0.05,
+    num_customers: int = 5_000,
+    seed: int | None = None,
+) -> pd.DataFrame:
+    """
+    Build ``num_records`` synthetic sales rows with whole-column NumPy draws.
+
+    Customer name / street / city come from a pool of ``num_customers``
+    identities, sampled by index, so only the pool touches Python per value.
+    ``date`` / ``invoice_date`` are returned as datetimes; ``write_csv``
+    formats them.
+    """
+    rng = np.random.default_rng(seed)
+    sales_channels = ["Direct", "Web", "Amazon-FBA", "Retail", "Etsy", "Wholesale"]
+    channel_weights = [0.4, 0.3, 0.1, 0.1, 0.05, 0.05]
+
+    # Transaction timestamps uniformly over the range, each invoiced 0-5 days later
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date) + pd.Timedelta(days=1)
+    seconds = rng.integers(0, int((end - start).total_seconds()), num_records)
+    trans_date = start + pd.to_timedelta(seconds, unit="s")
+    invoice_date = (trans_date + pd.to_timedelta(rng.integers(0, 6, num_records), unit="D")).normalize()
+
+    # Amounts, with occasional returns/credits as negative values
+    is_return = rng.random(num_records) < return_rate
+    amounts = np.round(rng.uniform(min_amount, max_amount, num_records), 2)
+    amounts = np.where(is_return, -amounts, amounts)
+
+    # Unique enough invoice numbers; credit memos are flagged in the prefix.
+    # Arrow string kernels join whole columns without per-row Python objects.
+    invoice_num = pc.binary_join_element_wise(
+        pa.array(np.where(is_return, "CREDIT-INV", "INV")),
+        pa.array(rng.integers(10000, 99999, num_records)).cast(pa.string()),
+        pa.array(np.arange(num_records)).cast(pa.string()),
+        "-",
+    )
+
+    identities = _identity_pool(num_customers, rng, seed)
+    who = identities.iloc[rng.integers(0, num_customers, num_records)].reset_index(drop=True)
+
+    df = pd.DataFrame({
+        "date": trans_date,
+        "invoice_number": pd.arrays.ArrowStringArray(invoice_num),
+        "invoice_date": invoice_date,
+        "total_amount": amounts,
+        "customer_name": who["customer_name"],
+        "street_address": who["street_address"],
+        "city": who["city"],
+        "state": rng.choice(STATES, num_records),
+        "zip_code": np.char.zfill(rng.integers(501, 99950, num_records).astype(str), 5),
+        "sales_channel": rng.choice(sales_channels, num_records, p=channel_weights),
+    })
     # Ensure schema matches expected input
-    df = df[[
-        'date', 'invoice_number', 'invoice_date', 'total_amount', 'customer_name',
-        'street_address', 'city', 'state', 'zip_code', 'sales_channel' # Updated columns
-    ]]
-    # ... (save to CSV, print summary)
-    logging.info(f"Generated {len(df[df['total_amount'] < 0])} return/credit records.")
-
-# ... (main execution block)
\ No newline at end of file
+    df = df[COLUMNS]
+    logging.info(f"Generated {int(is_return.sum())} return/credit records.")
+    return df
+
+
+def write_csv(df: pd.DataFrame, path: Path) -> None:
+    """Write ``df`` with Arrow's CSV writer (dates formatted in C++, not per row)."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.set_column(
+        table.schema.get_field_index("date"), "date", table["date"].cast(pa.timestamp("s"))
+    )
+    table = table.set_column(
+        table.schema.get_field_index("invoice_date"), "invoice_date", table["invoice_date"].cast(pa.date32())
+    )
+    pacsv.write_csv(table, path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--num-records", type=int, default=50_000)
+    parser.add_argument("-o", "--output", type=Path, default=Path("data/raw_sales_example.csv"))
+    parser.add_argument("--start-date", default="2021-01-01")
+    parser.add_argument("--end-date", default="2024-12-31")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    df = generate_synthetic_sales_data(
+        num_records=args.num_records,
+        start_date=args.start_date,
+        end_date=args.end_date,
+        seed=args.seed,
+    )
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    write_csv(df, args.output)
+    logging.info(f"Wrote {len(df)} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
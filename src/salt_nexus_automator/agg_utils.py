@@ -2,24 +2,237 @@
 """Vectorised aggregation helpers for Economic-Nexus analysis."""
 
 from __future__ import annotations
+import logging
 import os
+from functools import lru_cache
 from typing import Tuple
 
+import numpy as np
 import pandas as pd
 
+from .utils import label_isin
+
 __all__ = [
     "monthly_state_summary",
     "add_rolling_12m",
     "add_calendar_year_metrics",
     "evaluate_thresholds",
     "MARKETPLACE_CHANNELS",
+    "marketplace_mask",
+    "GROUPBY_BACKEND",
 ]
 
+logger = logging.getLogger(__name__)
+
 # -- Marketplace channels ----------------------------------------------------
-MARKETPLACE_CHANNELS = {
+# Parsed once at import; frozen so callers can't change it behind the
+# filter's back. Blank entries (e.g. a trailing comma) are ignored rather
+# than turning empty channel values into marketplace sales.
+MARKETPLACE_CHANNELS = frozenset(
     ch.strip().upper()
     for ch in os.getenv("MARKETPLACE_CHANNELS", "AMAZON-FBA,ETSY,EBAY").split(",")
-}
+    if ch.strip()
+)
+
+
+def marketplace_mask(channel: pd.Series) -> np.ndarray:
+    """
+    Boolean array marking rows whose channel is a marketplace channel.
+
+    Each distinct label is upper-cased and tested once (see
+    ``utils.label_isin``). Missing channels are False.
+    """
+    return label_isin(channel, MARKETPLACE_CHANNELS, upper=True)
+
+
+# -- Aggregation backend -----------------------------------------------------
+# "pandas" (default), "duckdb", "polars" or "numba"; the others are optional
+# and imported lazily, falling back to pandas when not installed.
+GROUPBY_BACKEND = os.getenv("NEXUS_GROUPBY_BACKEND", "pandas").strip().lower()
+
+
+def _periods_from_ordinals(ordinals: np.ndarray) -> pd.PeriodIndex:
+    return pd.PeriodIndex(pd.arrays.PeriodArray(ordinals.astype("int64"), dtype=pd.PeriodDtype("M")))
+
+
+def _state_codes(index: pd.MultiIndex) -> np.ndarray:
+    """
+    Integer state ids for a (state, month_year) index sorted by state.
+
+    The MultiIndex already holds codes into its state level; when that level
+    is sorted (as after sort_index) they follow the row order and are reused
+    as-is, so the state labels are never hashed again.
+    """
+    if index.levels[0].is_monotonic_increasing:
+        return index.codes[0].astype(np.int64)
+    return pd.factorize(index.get_level_values("state"))[0]
+
+
+def _sum_nunique_duckdb(keys: pd.DataFrame) -> pd.DataFrame:
+    import duckdb
+
+    sql = """
+        SELECT state, month_ord, SUM(total_amount) AS sales, COUNT(DISTINCT invoice_number) AS txns
+        FROM keys
+        WHERE state IS NOT NULL AND month_ord <> ?
+        GROUP BY state, month_ord
+        ORDER BY state, month_ord
+    """
+    con = duckdb.connect()
+    try:
+        con.register("keys", keys)
+        return con.execute(sql, [pd.NaT.value]).df()
+    finally:
+        con.close()
+
+
+def _sum_nunique_polars(keys: pd.DataFrame) -> pd.DataFrame:
+    import polars as pl
+
+    # One lazy plan: the null filter is fused into the group-by scan, and the
+    # final sort makes group order irrelevant, so none is maintained
+    return (
+        pl.from_pandas(keys)
+        .lazy()
+        .filter(pl.col("state").is_not_null() & (pl.col("month_ord") != pd.NaT.value))
+        .group_by(["state", "month_ord"])
+        .agg(
+            pl.col("total_amount").sum().alias("sales"),
+            pl.col("invoice_number").drop_nulls().n_unique().alias("txns"),
+        )
+        .sort(["state", "month_ord"])
+        .collect()
+        .to_pandas()
+    )
+
+
+@lru_cache(maxsize=None)
+def _sum_nunique_kernel():
+    """Compile (on first use) the fused sum + distinct-count numba kernel."""
+    from numba import njit
+
+    @njit(cache=True, nogil=True)
+    def kernel(group, invoice_hash, has_invoice, amount, ngroups):
+        sales = np.zeros(ngroups)
+        comp = np.zeros(ngroups)  # Kahan compensation, as pandas' groupby sum uses
+        txns = np.zeros(ngroups, dtype=np.int64)
+        # one open-addressed set of (group, invoice) keys, load factor <= 0.5
+        cap = 1
+        while cap < 2 * group.shape[0]:
+            cap <<= 1
+        seen = np.zeros(cap, dtype=np.uint64)
+        used = np.zeros(cap, dtype=np.bool_)
+        mask = np.uint64(cap - 1)
+        for i in range(group.shape[0]):
+            g = group[i]
+            if g < 0:
+                continue
+            x = amount[i]
+            if not np.isnan(x):
+                y = x - comp[g]
+                t = sales[g] + y
+                comp[g] = (t - sales[g]) - y
+                sales[g] = t
+            if not has_invoice[i]:  # missing invoice numbers don't count, like nunique
+                continue
+            key = invoice_hash[i] ^ (np.uint64(g + 1) * np.uint64(0x9E3779B97F4A7C15))
+            h = (key ^ (key >> np.uint64(29))) & mask
+            while used[h] and seen[h] != key:
+                h = (h + np.uint64(1)) & mask
+            if not used[h]:
+                used[h] = True
+                seen[h] = key
+                txns[g] += 1
+        return sales, txns
+
+    return kernel
+
+
+def _sum_nunique_numba(keys: pd.DataFrame) -> pd.DataFrame:
+    kernel = _sum_nunique_kernel()
+
+    # Integer group ids: state code and month ordinal packed into one int64
+    state_codes, states = pd.factorize(keys["state"])
+    month_ord = keys["month_ord"].to_numpy()
+    valid = (state_codes >= 0) & (month_ord != pd.NaT.value)
+    base = month_ord[valid].min() if valid.any() else 0
+    span = (month_ord[valid].max() - base + 1) if valid.any() else 1
+    packed = np.where(valid, state_codes * span + (month_ord - base), -1)
+    group, uniq = pd.factorize(packed, sort=True)  # sorted → output in (state code, month) order
+    if len(uniq) and uniq[0] == -1:  # invalid rows form their own group; drop it
+        group, uniq = group - 1, uniq[1:]
+
+    # Invoices are compared by 64-bit hash: far cheaper than factorising the
+    # strings, and a collision (~n²/2⁶⁵ odds) would only undercount by one
+    invoices = keys["invoice_number"].to_numpy()
+    sales, txns = kernel(
+        group.astype(np.int64),
+        pd.util.hash_array(invoices, categorize=False),
+        pd.notna(invoices),
+        keys["total_amount"].to_numpy(dtype="float64"),
+        len(uniq),
+    )
+    return pd.DataFrame({
+        "state": np.asarray(states, dtype=object)[uniq // span],
+        "month_ord": uniq % span + base,
+        "sales": sales,
+        "txns": txns,
+    })
+
+
+def _distinct_invoices(grouped, invoices: np.ndarray, ngroups: int) -> np.ndarray:
+    """
+    Distinct non-null invoice numbers per group of ``grouped``, in its group order.
+
+    Invoice numbers repeat across an invoice's lines, so rows can't simply be
+    counted. Each (group, invoice) pair is folded into one 64-bit hash, as in
+    the numba kernel, and first occurrences are counted: one integer dedup
+    over the column instead of a string hash set per group.
+    """
+    ids = grouped.ngroup().fillna(-1).to_numpy().astype(np.int64)  # -1: dropped NaN key
+    key = pd.util.hash_array(invoices, categorize=False) ^ (
+        (ids + 1).astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    )
+    keep = (ids >= 0) & pd.notna(invoices)
+    keep[keep] = ~pd.Series(key[keep]).duplicated().to_numpy()
+    return np.bincount(ids[keep], minlength=ngroups)
+
+
+_BACKENDS = {"duckdb": _sum_nunique_duckdb, "polars": _sum_nunique_polars, "numba": _sum_nunique_numba}
+
+
+def _sum_nunique(df: pd.DataFrame) -> pd.DataFrame:
+    """Sales sum and distinct invoice count per (state, month_year)."""
+    backend = _BACKENDS.get(GROUPBY_BACKEND)
+    if backend is not None:
+        keys = pd.DataFrame({
+            "state": df["state"].array,  # categorical codes stay codes
+            "month_ord": df["month_year"].array.asi8,
+            "total_amount": df["total_amount"].to_numpy(),
+            "invoice_number": df["invoice_number"].to_numpy(),
+        })
+        try:
+            out = backend(keys)
+        except ImportError:
+            logger.warning("%s is not installed; falling back to pandas groupby.", GROUPBY_BACKEND)
+        else:
+            index = pd.MultiIndex.from_arrays(
+                [out["state"].to_numpy(), _periods_from_ordinals(out["month_ord"].to_numpy())],
+                names=["state", "month_year"],
+            )
+            return pd.DataFrame(
+                {"sales": out["sales"].to_numpy(dtype="float64"), "txns": out["txns"].to_numpy(dtype="int64")},
+                index=index,
+            )
+
+    grouped = df.groupby(["state", "month_year"], sort=False, observed=True)
+    g = grouped["total_amount"].sum().rename("sales").to_frame()
+    g["txns"] = _distinct_invoices(grouped, df["invoice_number"].to_numpy(), len(g))
+    # Categorical state keys are only needed for grouping; hand back plain labels
+    if isinstance(g.index.levels[0], pd.CategoricalIndex):
+        g.index = g.index.set_levels(g.index.levels[0].astype(object), level=0)
+    return g
+
 
 # --------------------------------------------------------------------------- #
 # 1. Raw → monthly summary                                                    #
@@ -34,8 +247,10 @@ def monthly_state_summary(df: pd.DataFrame) -> pd.DataFrame:
     if "month_year" not in df.columns or not pd.api.types.is_period_dtype(df["month_year"]):
          # Assuming invoice_date is available and is a DatetimeIndex or can be converted
          if not isinstance(df.index, pd.DatetimeIndex) and "invoice_date" in df.columns:
-              df = df.copy() # Avoid SettingWithCopyWarning
-              df["invoice_date"] = pd.to_datetime(df["invoice_date"])
+              # Shallow copy: only the index and month_year are replaced
+              df = df.copy(deep=False)
+              if not pd.api.types.is_datetime64_any_dtype(df["invoice_date"]):
+                  df["invoice_date"] = pd.to_datetime(df["invoice_date"])
               df = df.set_index("invoice_date")
 
          if isinstance(df.index, pd.DatetimeIndex):
@@ -45,18 +260,14 @@ def monthly_state_summary(df: pd.DataFrame) -> pd.DataFrame:
              raise TypeError("DataFrame must have 'month_year' column or a DatetimeIndex.")
 
 
-    g = (
-        df.groupby(["state", "month_year"], sort=True)
-        .agg(
-            sales=("total_amount", "sum"),
-            txns=("invoice_number", "nunique"),
-        )
-        # The result of groupby on columns is a DataFrame with a MultiIndex.
-        # We want to keep this MultiIndex as ['state', 'month_year'].
-        # No reset_index() is needed here before setting the index, as groupby already creates it.
-    )
+    # The result is a DataFrame with a MultiIndex ['state', 'month_year'],
+    # whichever backend produced it. Groups come back unsorted; one sort of
+    # the (small) aggregate gives add_rolling_12m the order it relies on.
+    g = _sum_nunique(df).sort_index()
     # Ensure the index names are explicitly set after groupby
     g.index.names = ["state", "month_year"]
+    # Distinct invoices per state-month fit comfortably in 32 bits
+    g["txns"] = g["txns"].astype("int32")
 
     # Ensure 'cy' column is created from 'month_year' Period data
     # Corrected: Access .year directly on the PeriodIndex level (removed .dt)
@@ -78,17 +289,35 @@ def add_rolling_12m(df_m: pd.DataFrame, *, window: int = 12) -> pd.DataFrame:
     if not isinstance(df_m.index, pd.MultiIndex) or list(df_m.index.names) != ["state", "month_year"]:
         raise TypeError("Input must use MultiIndex ['state', 'month_year'].")
 
-    # transform → result is aligned 1-for-1 with the original index,
-    # so there is no extra level to drop and no column overlap.
-    # Using transform applies the rolling sum within each group and returns
-    # a DataFrame with the same index as the original df_m.
-    rolled = (
-        df_m.groupby(level=0)[["sales", "txns"]]
-        .transform(lambda s: s.rolling(window, min_periods=1).sum())
-        .rename(columns={"sales": "sales_12m", "txns": "txns_12m"})
-    )
+    if df_m.empty:
+        return df_m.assign(sales_12m=df_m["sales"], txns_12m=df_m["txns"])
+    if not df_m.index.is_monotonic_increasing:
+        df_m = df_m.sort_index()
+
+    # A rolling sum is cumsum[i] - cumsum[last row at least `window` months
+    # earlier], all in flat NumPy arrays. Months are located by ordinal, so
+    # gaps in a state's history are handled without reindexing to a full
+    # monthly range.
+    state_codes = _state_codes(df_m.index)
+    months = df_m.index.get_level_values("month_year").asi8
+    months = months - months.min()
+    span = months.max() + window + 1
+    key = state_codes * span + months            # sorted: state block, then month
+    state_start = np.searchsorted(key, state_codes * span, side="left")
+    prev = np.searchsorted(key, key - window, side="right") - 1
+    # Subtract the running total up to the window's start, or up to the end
+    # of the previous state when the window reaches back past this one's start
+    lo = np.where(prev >= state_start, prev, state_start - 1)
+    has_lo = lo >= 0
+    lo = np.where(has_lo, lo, 0)
 
-    # indexes now match exactly → join is safe
+    rolled = {}
+    for col in ("sales", "txns"):
+        cs = np.cumsum(df_m[col].to_numpy())  # one running total across all states
+        rolled[f"{col}_12m"] = cs - np.where(has_lo, cs[lo], 0)
+    rolled = pd.DataFrame(rolled, index=df_m.index)
+
+    # indexes match exactly → join is safe
     return df_m.join(rolled)
 
 
@@ -115,67 +344,120 @@ def add_calendar_year_metrics(df_m: pd.DataFrame) -> pd.DataFrame:
          except Exception as e:
              raise TypeError("Input DataFrame must contain a 'cy' column or have 'month_year' in index.") from e
 
+    if df_m.empty:
+        return df_m.assign(
+            sales_prev_yr=np.nan, txns_prev_yr=np.nan,
+            sales_curr_ytd=df_m["sales"], txns_curr_ytd=df_m["txns"],
+        )
+    if not df_m.index.is_monotonic_increasing:
+        df_m = df_m.sort_index()
 
-    # Calculate previous year totals by grouping by state and year, then shifting
-    prev_totals = (
-        df_m.groupby(level="state")[["sales", "txns"]].sum() # Group by state level, sum sales/txns
-            .groupby(level="state")[["sales", "txns"]] # Group again by state level for shift
-            .shift(1) # Shift by one year within each state group (assuming annual grouping)
-            .rename(columns={"sales": "sales_prev_yr", "txns": "txns_prev_yr"})
-    )
-    # The index of prev_totals will be ['state', 'cy'] after the sum and shift
+    # Sorted by (state, month) → each (state, calendar year) is one contiguous
+    # segment of rows; seg_starts marks where each segment begins.
+    state_codes = _state_codes(df_m.index)
+    cy = df_m["cy"].to_numpy().astype(np.int64)
+    first_cy = cy.min()
+    years = cy.max() - first_cy + 2
+    seg_key = state_codes * years + (cy - first_cy)
+    new_seg = np.r_[True, seg_key[1:] != seg_key[:-1]]
+    seg_starts = np.flatnonzero(new_seg)
+    seg_of_row = np.cumsum(new_seg) - 1
 
-    # Calculate current year-to-date totals by grouping by state and using cumulative sum
-    curr_ytd = (
-        df_m.groupby(level="state")[["sales", "txns"]] # Group by state level
-            .cumsum() # Cumulative sum within each state group
-            .rename(columns={"sales": "sales_curr_ytd", "txns": "txns_curr_ytd"})
-    )
-    # The index of curr_ytd will be ['state', 'month_year']
+    # Previous calendar year: the (state, cy - 1) segment's total. A year the
+    # data covers but the state had no sales in counts as 0; a year before the
+    # data starts is unknown (NaN).
+    seg_keys = seg_key[seg_starts]
+    prev_seg = np.minimum(np.searchsorted(seg_keys, seg_keys - 1), len(seg_keys) - 1)
+    has_prev = seg_keys[prev_seg] == seg_keys - 1
+    in_range = cy[seg_starts] > first_cy
 
-    # Join the calculated metrics back to the original monthly summary.
-    # Joining prev_totals (indexed by ['state', 'cy']) to df_m (indexed by ['state', 'month_year'])
-    # requires pandas to align based on the shared 'state' level and implicitly 'cy' from df_m's column.
-    # Joining curr_ytd works directly on the MultiIndex ['state', 'month_year'].
-    # A simple join on df_m's index should work.
-    return df_m.join([prev_totals, curr_ytd])
+    metrics = {}
+    for col in ("sales", "txns"):
+        values = df_m[col].to_numpy()
+        yearly = np.add.reduceat(values, seg_starts)
+        prev = np.where(has_prev, yearly[prev_seg], np.where(in_range, 0.0, np.nan))
+        metrics[f"{col}_prev_yr"] = prev[seg_of_row]
+
+    # Current year-to-date: running total restarted at each segment
+    for col in ("sales", "txns"):
+        cs = np.cumsum(df_m[col].to_numpy())
+        before = np.r_[0, cs][seg_starts]  # running total just before each segment
+        metrics[f"{col}_curr_ytd"] = cs - before[seg_of_row]
+
+    # Same row order as df_m → attach by position, no index alignment
+    return df_m.assign(**metrics)
 
 # --------------------------------------------------------------------------- #
 # 4. Threshold evaluator                                                      #
 # --------------------------------------------------------------------------- #
+def _threshold_bases(df_v: pd.DataFrame, rule: str | None) -> Tuple[np.ndarray, np.ndarray]:
+    """(sales, txns) arrays a lookback rule measures against its thresholds."""
+    if rule == "calendar_prev_curr":
+        # Use max of previous calendar year total and current year-to-date;
+        # fmax skips NaN the way DataFrame.max(axis=1) does
+        sales_base = np.fmax(df_v["sales_prev_yr"].to_numpy(), df_v["sales_curr_ytd"].to_numpy())
+        txns_base  = np.fmax(df_v["txns_prev_yr"].to_numpy(),  df_v["txns_curr_ytd"].to_numpy())
+    elif rule == "calendar_prev":
+        # Use previous calendar year total
+        sales_base = df_v["sales_prev_yr"].to_numpy()
+        txns_base  = df_v["txns_prev_yr"].to_numpy()
+    else:  # default -> rolling_12m
+        # Use rolling 12-month totals
+        sales_base = df_v["sales_12m"].to_numpy()
+        txns_base  = df_v["txns_12m"].to_numpy()
+    return sales_base, txns_base
+
+
+def _met(base: np.ndarray, threshold, n: int) -> np.ndarray:
+    # an unset threshold (None, or NaN in a per-row array) is never met
+    if threshold is None:
+        return np.zeros(n, dtype=bool)
+    with np.errstate(invalid="ignore"):
+        return base >= threshold
+
+
 def evaluate_thresholds(
     df_v: pd.DataFrame,
-    rule: str,
-    sales_th: float | None,
-    txn_th: int | None,
+    rule: str | np.ndarray | pd.Categorical,
+    sales_th: float | np.ndarray | None,
+    txn_th: int | np.ndarray | None,
 ) -> pd.DataFrame:
     """
     Evaluates if sales or transaction thresholds are met based on a rule.
 
     Expects input DataFrame `df_v` to contain the necessary columns
     ('sales_12m', 'txns_12m', 'sales_prev_yr', etc.) based on the rule.
-    """
-    if rule == "calendar_prev_curr":
-        # Use max of previous calendar year total and current year-to-date
-        sales_base = df_v[["sales_prev_yr", "sales_curr_ytd"]].max(axis=1)
-        txns_base  = df_v[["txns_prev_yr",  "txns_curr_ytd"] ].max(axis=1)
-    elif rule == "calendar_prev":
-        # Use previous calendar year total
-        sales_base = df_v["sales_prev_yr"]
-        txns_base  = df_v["txns_prev_yr"]
-    else:  # default -> rolling_12m
-        # Use rolling 12-month totals
-        sales_base = df_v["sales_12m"]
-        txns_base  = df_v["txns_12m"]
 
-    # Evaluate thresholds
-    sales_met = (sales_base >= sales_th) if sales_th is not None else False
-    txn_met = (txns_base  >= txn_th)  if txn_th  is not None else False
+    ``rule`` and the thresholds may also be per-row arrays, so many states
+    can be evaluated in one call; NaN marks an unset threshold. A
+    Categorical ``rule`` is split on its integer codes.
+    """
+    n = len(df_v)
+    if isinstance(rule, str) or rule is None:
+        sales_base, txns_base = _threshold_bases(df_v, rule)
+    else:
+        if isinstance(rule, pd.Categorical):
+            codes, labels = rule.codes, rule.categories
+        else:
+            codes, labels = pd.factorize(np.asarray(rule, dtype=object))
+        present = np.unique(codes)
+        if len(present) == 1:
+            # Typical deployment: every row under one rule, so its base
+            # columns are compared directly with no masked gather
+            code = present[0]
+            sales_base, txns_base = _threshold_bases(df_v, labels[code] if code >= 0 else None)
+        else:
+            sales_base, txns_base = np.empty(n), np.empty(n)
+            for code in present:  # one pass per distinct rule, not per state
+                mask = codes == code
+                s_base, t_base = _threshold_bases(df_v, labels[code] if code >= 0 else None)
+                sales_base[mask], txns_base[mask] = s_base[mask], t_base[mask]
 
     return pd.DataFrame(
         {
-            "sales_met": sales_met,
-            "txn_met": txn_met,
+            "sales_met": _met(sales_base, sales_th, n),
+            "txn_met": _met(txns_base, txn_th, n),
         },
         index=df_v.index, # Preserve the original index (should be MultiIndex)
+        copy=False,
     )
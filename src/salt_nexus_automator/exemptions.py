@@ -1,8 +1,16 @@
 # src/exemptions.py
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pacsv
 import logging
 import os
-from .utils import ErrorCollector
+from .utils import ErrorCollector, label_isin
+
+# TODO: Define exempt codes more robustly, possibly in config?
+EXEMPT_TAXABILITY_CODES = frozenset({'EXEMPT', 'RESALE', 'WHOLESALE', 'GOVERNMENT', 'NONTAXABLE'}) # Example codes
+
 
 class ExemptionManager:
     """Handles tagging and filtering of exempt transactions."""
@@ -18,7 +26,11 @@ class ExemptionManager:
             exempt_customer_csv (str, optional): Path to supplemental exempt customer list. Defaults to None.
             exempt_invoice_csv (str, optional): Path to supplemental exempt invoice list. Defaults to None.
         """
-        self.sales_df = sales_df.copy() # Work on a copy
+        # Shallow copy: shares the caller's column data without duplicating it.
+        # Only whole columns are ever (re)assigned on it, so the caller's
+        # frame is never modified; callers should not mutate theirs in place
+        # while this manager is in use.
+        self.sales_df = sales_df.copy(deep=False)
         self.error_collector = error_collector
         self.exempt_customer_csv = exempt_customer_csv
         self.exempt_invoice_csv = exempt_invoice_csv
@@ -33,26 +45,35 @@ class ExemptionManager:
         logging.info("ExemptionManager initialized.")
 
 
-    def _load_exempt_list(self, file_path: str, column_name: str) -> set:
+    def _load_exempt_list(self, file_path: str, column_name: str) -> frozenset:
         """Loads exempt IDs/numbers from a CSV file, reporting errors."""
-        exempt_set = set()
+        exempt_set = frozenset()
         if file_path and os.path.exists(file_path):
             logging.info(f"Loading exemption list from: {file_path} using column '{column_name}'")
             try:
-                df = pd.read_csv(file_path)
-                if column_name not in df.columns:
-                    msg = f"Exemption file {file_path} missing required column '{column_name}'. Cannot apply these exemptions."
-                    self.error_collector.add_warning(msg)
-                    logging.warning(msg)
-                else:
-                    # Convert to string for consistent matching, drop NaNs/empty strings
-                    exempt_items = df[column_name].dropna().astype(str).str.strip()
-                    exempt_set = set(exempt_items[exempt_items != ''])
-                    logging.info(f"Loaded {len(exempt_set)} unique exempt identifiers from {file_path}.")
+                # Only the match column is parsed, directly as text
+                column = pacsv.read_csv(
+                    file_path,
+                    convert_options=pacsv.ConvertOptions(
+                        include_columns=[column_name],
+                        column_types={column_name: pa.string()},
+                        strings_can_be_null=True,
+                    ),
+                ).column(0)
+            except KeyError:  # pyarrow's ArrowKeyError: column not in the header
+                msg = f"Exemption file {file_path} missing required column '{column_name}'. Cannot apply these exemptions."
+                self.error_collector.add_warning(msg)
+                logging.warning(msg)
             except Exception as e:
                  msg = f"Error loading or processing exemption file {file_path}: {e}"
                  self.error_collector.add_warning(msg)
                  logging.error(msg, exc_info=True)
+            else:
+                # Trim, then drop missing / empty identifiers, all in Arrow compute
+                exempt_items = pc.utf8_trim_whitespace(column).drop_null()
+                exempt_items = exempt_items.filter(pc.not_equal(exempt_items, ""))
+                exempt_set = frozenset(exempt_items.to_pylist())
+                logging.info(f"Loaded {len(exempt_set)} unique exempt identifiers from {file_path}.")
         elif file_path:
              # File path provided but not found
              msg = f"Exemption file not found: {file_path}. Skipping this exemption source."
@@ -72,22 +93,22 @@ class ExemptionManager:
             logging.warning("Sales DataFrame is empty. Skipping exemption application.")
             return self.sales_df
 
-        initial_exempt_count = self.sales_df['is_exempt'].sum()
-        current_exempt_mask = self.sales_df['is_exempt'].copy()
+        # Each rule contributes one bool ndarray; they are OR-ed in one pass at the end
+        source_mask = self.sales_df['is_exempt'].to_numpy(dtype=bool)
+        exempt_masks = [source_mask]
+        initial_exempt_count = source_mask.sum()
 
         # 1. Check for existing exemption indicator columns in source data
         # Use existing 'is_exempt' column value if present and True
-        logging.debug(f"Initial exemptions from source 'is_exempt' column: {current_exempt_mask.sum()}")
+        logging.debug(f"Initial exemptions from source 'is_exempt' column: {initial_exempt_count}")
 
 
         # Check for taxability code (example using common exempt values)
         if 'taxability_code' in self.sales_df.columns:
-             # TODO: Define exempt codes more robustly, possibly in config?
-             exempt_codes = ['EXEMPT', 'RESALE', 'WHOLESALE', 'GOVERNMENT', 'NONTAXABLE'] # Example codes
-             # Handle potential NaN values in the column before string operations
-             code_exempt_mask = self.sales_df['taxability_code'].fillna('').astype(str).str.upper().isin(exempt_codes)
+             # Upper-cases the few distinct codes, not every row
+             code_exempt_mask = label_isin(self.sales_df['taxability_code'], EXEMPT_TAXABILITY_CODES, upper=True)
              newly_exempted_by_code = code_exempt_mask.sum()
-             current_exempt_mask |= code_exempt_mask # Combine with existing mask using OR
+             exempt_masks.append(code_exempt_mask)
              logging.info(f"Applied exemptions based on 'taxability_code': {newly_exempted_by_code} rows marked.")
 
         # 2. Apply exemptions based on supplemental customer/invoice CSV files
@@ -99,23 +120,24 @@ class ExemptionManager:
         exempt_invoices = self._load_exempt_list(self.exempt_invoice_csv, 'invoice_number')
 
         if exempt_customers and customer_match_col in self.sales_df.columns:
-             cust_exempt_mask = self.sales_df[customer_match_col].astype(str).isin(exempt_customers)
+             cust_exempt_mask = label_isin(self.sales_df[customer_match_col], exempt_customers)
              newly_exempted_by_cust = cust_exempt_mask.sum()
-             current_exempt_mask |= cust_exempt_mask
+             exempt_masks.append(cust_exempt_mask)
              logging.info(f"Applied exemptions based on Customer List CSV using column '{customer_match_col}': {newly_exempted_by_cust} rows marked.")
         elif exempt_customers:
              logging.warning(f"Could not apply customer exemptions: Column '{customer_match_col}' not found in sales data.")
 
 
         if exempt_invoices and 'invoice_number' in self.sales_df.columns:
-             inv_exempt_mask = self.sales_df['invoice_number'].astype(str).isin(exempt_invoices)
+             inv_exempt_mask = label_isin(self.sales_df['invoice_number'], exempt_invoices)
              newly_exempted_by_inv = inv_exempt_mask.sum()
-             current_exempt_mask |= inv_exempt_mask
+             exempt_masks.append(inv_exempt_mask)
              logging.info(f"Applied exemptions based on Invoice List CSV: {newly_exempted_by_inv} rows marked.")
 
         # Apply the final combined mask
+        current_exempt_mask = np.logical_or.reduce(exempt_masks)
         self.sales_df['is_exempt'] = current_exempt_mask
-        final_exempt_count = self.sales_df['is_exempt'].sum()
+        final_exempt_count = current_exempt_mask.sum()
         total_newly_marked = final_exempt_count - initial_exempt_count
 
         logging.info(f"Exemption application complete. Total exempt transactions: {final_exempt_count} ({total_newly_marked} newly marked via rules/lists).")
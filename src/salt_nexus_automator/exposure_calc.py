@@ -4,13 +4,107 @@
 from __future__ import annotations
 
 import logging
-from typing import Dict, Any
+import os
+from functools import cached_property, lru_cache
+from typing import Callable, Dict, Any, Tuple
 
-from dateutil.relativedelta import relativedelta
 import numpy as np
 import pandas as pd
 
-from .utils import ErrorCollector
+from .utils import ErrorCollector, frame_fingerprint
+
+# Per-state parameters read from ``state_config`` and their fallbacks
+PARAM_DEFAULTS: Dict[str, Any] = {
+    "tax_rate": None,
+    "vda_lookback_cap": 36,
+    "vda_interest_rate": 0.05,
+    "standard_penalty_rate": 0.25,
+    "vda_penalty_waived": True,
+}
+
+
+# Every month column is normalised to this once per input, so the exposure
+# arithmetic can work on raw month ordinals without further checks
+MONTHLY = pd.PeriodDtype("M")
+
+# Output columns of the VDA kernel, in the order it returns them
+VDA_COLUMNS: Tuple[str, ...] = (
+    "full_interest",
+    "full_penalty",
+    "full_liability",
+    "vda_tax",
+    "vda_interest",
+    "vda_penalty",
+    "vda_liability",
+    "estimated_vda_savings",
+)
+
+# Set NEXUS_USE_NUMBA=0 to force the NumPy kernel even when numba is installed
+USE_NUMBA = os.getenv("NEXUS_USE_NUMBA", "1").strip().lower() not in {"0", "false", "no"}
+
+
+def _vda_amounts_numpy(tax, months_late, in_vda, monthly_rate, p_rate, waived):
+    """Full vs VDA liability per row; arguments are equal-length 1-D arrays."""
+    full_interest = tax * monthly_rate * months_late
+    full_penalty = tax * p_rate
+    full_liability = tax + full_interest + full_penalty
+    vda_tax = np.where(in_vda, tax, 0.0)
+    vda_interest = np.where(in_vda, full_interest, 0.0)
+    vda_penalty = vda_tax * np.where(waived, 0.0, p_rate)
+    vda_liability = vda_tax + vda_interest + vda_penalty
+    return (
+        full_interest, full_penalty, full_liability,
+        vda_tax, vda_interest, vda_penalty, vda_liability,
+        full_liability - vda_liability,
+    )
+
+
+@lru_cache(maxsize=None)
+def _vda_kernel() -> Callable[..., Tuple[np.ndarray, ...]]:
+    """
+    Fused single-pass kernel when numba is available, else the NumPy one.
+
+    Compiled on first use for the one dtype signature ``calculate_exposure``
+    passes, so no type inference runs per call; ``cache=True`` keeps the
+    machine code on disk so later processes skip the compile. ``fastmath``
+    is left off: it would let the compiler assume NaN-free inputs.
+    """
+    if not USE_NUMBA:
+        return _vda_amounts_numpy
+    try:
+        from numba import njit, prange
+    except ImportError:
+        return _vda_amounts_numpy
+
+    @njit("float64[:, :](float64[:], int16[:], boolean[:], float64[:], float64[:], boolean[:])",
+          parallel=True, cache=True)
+    def _vda_amounts_numba(tax, months_late, in_vda, monthly_rate, p_rate, waived):
+        n = tax.shape[0]
+        out = np.empty((len(VDA_COLUMNS), n))
+        for i in prange(n):
+            interest = tax[i] * monthly_rate[i] * months_late[i]
+            penalty = tax[i] * p_rate[i]
+            full = tax[i] + interest + penalty
+            if in_vda[i]:
+                v_tax, v_interest = tax[i], interest
+            else:
+                v_tax, v_interest = 0.0, 0.0
+            v_penalty = 0.0 if waived[i] else v_tax * p_rate[i]
+            v_full = v_tax + v_interest + v_penalty
+            out[0, i] = interest
+            out[1, i] = penalty
+            out[2, i] = full
+            out[3, i] = v_tax
+            out[4, i] = v_interest
+            out[5, i] = v_penalty
+            out[6, i] = v_full
+            out[7, i] = full - v_full
+        return out
+
+    def run(*arrays):
+        return tuple(_vda_amounts_numba(*arrays))
+
+    return run
 
 
 class ExposureCalculator:
@@ -38,46 +132,155 @@ class ExposureCalculator:
         self.config = state_config
         self.vda_option = vda_option
         self.error_collector = error_collector
+        # validated per-state parameters, one row per configured state
+        self.params = self._build_params(state_config)
 
         # will be set on first calculate_exposure() call
         self.sales_df: pd.DataFrame | None = None
         self.nexus_summary: pd.DataFrame | None = None
+        # frames as passed in, to recognise a repeat call with the same inputs
+        self._inputs: tuple[pd.DataFrame, pd.DataFrame] | None = None
+        # their fingerprints, to notice in-place edits between calls
+        self._input_key: tuple | None = None
 
         logging.info("ExposureCalculator initialised (VDA option=%s).", vda_option)
 
     # ─────────────────────────────────────────────────────────────
     # 2. helper methods
     # ─────────────────────────────────────────────────────────────
-    def _get_state_params(self, state: str) -> Dict[str, Any] | None:
-        params = self.config.get(state)
-        if params is None and self.error_collector:
-            self.error_collector.add_warning(
-                f"No configuration found for state '{state}'. Skipping."
-            )
+    @staticmethod
+    def _build_params(state_config: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Per-state exposure parameters as one typed frame indexed by state.
+
+        Missing keys fall back to ``PARAM_DEFAULTS``; falsy lookback / rate
+        values also take the default. ``tax_rate`` is NaN when missing or
+        unparseable – such states are reported when they trigger nexus.
+        """
+        params = pd.DataFrame.from_dict(
+            {
+                state: {key: cfg.get(key, default) for key, default in PARAM_DEFAULTS.items()}
+                for state, cfg in state_config.items()
+                if isinstance(cfg, dict)
+            },
+            orient="index",
+            columns=list(PARAM_DEFAULTS),
+        )
+        params.index.name = "state"
+        params["tax_rate"] = pd.to_numeric(params["tax_rate"], errors="coerce").astype("float64")
+        for col in ("vda_lookback_cap", "vda_interest_rate", "standard_penalty_rate"):
+            values = pd.to_numeric(params[col], errors="coerce")
+            params[col] = values.where(values.notna() & (values != 0), PARAM_DEFAULTS[col])
+        params["vda_lookback_cap"] = params["vda_lookback_cap"].astype("int16")
+        params["vda_penalty_waived"] = params["vda_penalty_waived"].map(bool).astype(bool)
         return params
 
     @staticmethod
-    def _calculate_interest(
-        tax_amount: float, annual_rate: float, months_late: int
-    ) -> float:
-        """Simple monthly-interest calculator with guards."""
+    def _fingerprint(sales_df: pd.DataFrame, nexus_summary: pd.DataFrame) -> tuple:
+        """Cache key for one pair of inputs (see ``frame_fingerprint``)."""
+        return (
+            frame_fingerprint(sales_df, edge_cols=("invoice_date", "month_year"), sum_cols=("total_amount", "is_exempt")),
+            frame_fingerprint(nexus_summary, edge_cols=("state", "first_trigger_month")),
+        )
+
+    @staticmethod
+    def _normalise_inputs(
+        sales_df: pd.DataFrame, nexus_summary: pd.DataFrame
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """DatetimeIndex + Period[M] ``month_year`` on sales, Period[M] trigger months on the summary."""
+        # ── normalise sales index / month_year ──────────────────
+        # Changes go on a shallow copy: it shares the caller's column arrays,
+        # and replacing or adding a column there never writes into them.
+        # (set_index / assign would deep-copy every column first.)
+        caller_df = sales_df
+        # Ensure sales index is DatetimeIndex
+        if not isinstance(sales_df.index, pd.DatetimeIndex):
+            if "invoice_date" in sales_df.columns:
+                # Coerce 'invoice_date' to datetime and move it to the index
+                sales_df = sales_df.copy(deep=False)
+                sales_df.index = pd.DatetimeIndex(pd.to_datetime(sales_df.pop("invoice_date")))
+            else:
+                raise TypeError(
+                    "Sales DataFrame must contain 'invoice_date' column if index is not a DatetimeIndex."
+                )
+
+        # Ensure 'month_year' column exists and is Period[M] based on the (now confirmed) DatetimeIndex
+        # This handles cases where month_year might be missing or not the correct dtype
+        # (including Periods of another frequency, whose ordinals aren't months)
+        if "month_year" not in sales_df.columns or sales_df["month_year"].dtype != MONTHLY:
+            # Create or overwrite 'month_year' from the DatetimeIndex
+            if sales_df is caller_df:
+                sales_df = sales_df.copy(deep=False)
+            sales_df["month_year"] = sales_df.index.to_period("M")
+
+
+        # ── validate / auto-coerce nexus_summary columns ────────
+        # auto-convert first_trigger_month to Period[M] if needed
         if (
-            pd.isna(tax_amount)
-            or pd.isna(annual_rate)
-            or pd.isna(months_late)
-            or annual_rate < 0
-            or months_late < 0
+            "first_trigger_month" in nexus_summary.columns
+            and not pd.api.types.is_period_dtype(nexus_summary["first_trigger_month"])
+        ):
+            logging.info("Coercing 'first_trigger_month' to Period[M] in nexus_summary.")
+            first = nexus_summary["first_trigger_month"]
+            if pd.api.types.infer_dtype(first, skipna=True) == "period":
+                # object column of Period / NaT values (e.g. after a concat or
+                # fillna): take the Periods as they are, no string round-trip
+                first = pd.PeriodIndex(first.to_numpy(), freq="M")
+            else:
+                first = pd.PeriodIndex(pd.to_datetime(first), freq="M")
+            nexus_summary = nexus_summary.assign(first_trigger_month=first)
+        elif (
+            "first_trigger_month" in nexus_summary.columns
+            and nexus_summary["first_trigger_month"].dtype != MONTHLY
         ):
-            return 0.0
-        return tax_amount * (annual_rate / 12.0) * months_late
+            logging.info("Converting 'first_trigger_month' to monthly Periods in nexus_summary.")
+            nexus_summary = nexus_summary.assign(
+                first_trigger_month=nexus_summary["first_trigger_month"].dt.asfreq("M")
+            )
+
+        # Validate required Period columns (now only first_trigger_month)
+        for col in ("first_trigger_month",):
+            if col not in nexus_summary.columns or nexus_summary[col].dtype != MONTHLY:
+                raise TypeError(
+                    f"Nexus summary must contain Period[M] column '{col}'."
+                )
+
+        return sales_df, nexus_summary
 
     # ─────────────────────────────────────────────────────────────
     # 3. public API
     # ─────────────────────────────────────────────────────────────
+    @cached_property
+    def monthly_taxable_sales(self) -> pd.DataFrame:
+        """Taxable (non-exempt) sales per state × month of ``self.sales_df``, sorted."""
+        sales = self.sales_df
+        return (
+            sales.loc[~sales["is_exempt"], ["state", "month_year", "total_amount"]]
+            .groupby(["state", "month_year"], observed=True, sort=False)["total_amount"]
+            .sum()
+            .sort_index()  # sort the aggregate once so output stays state/month ordered
+            .reset_index()
+            .rename(columns={"total_amount": "taxable_sales"})
+            .astype({"state": object})
+        )
+
+    @cached_property
+    def first_triggers(self) -> pd.DataFrame:
+        """Earliest ``first_trigger_month`` per state of ``self.nexus_summary``."""
+        # min() skips NaT, so rows are not pre-filtered; states that never
+        # triggered come out NaT and are dropped from the per-state result
+        return (
+            self.nexus_summary
+            .groupby("state", sort=False, observed=True)["first_trigger_month"]
+            .min()
+            .dropna()
+            .to_frame()
+        )
+
     def calculate_exposure(
         self,
-        sales_df: pd.DataFrame,
-        nexus_summary: pd.DataFrame,
+        sales_df: pd.DataFrame | None = None,
+        nexus_summary: pd.DataFrame | None = None,
     ) -> pd.DataFrame:
         """
         Compute exposure for every state that triggered nexus.
@@ -93,7 +296,24 @@ class ExposureCalculator:
         -------
         pd.DataFrame
             Exposure detail by state / month, or empty frame if nothing to do.
+
+        Neither input is copied or modified; derived columns are added to new
+        frames, which share data with the inputs.
+
+        The taxable monthly aggregate and first triggers are cached. Calling
+        again with no arguments (or the same frames), e.g. after changing
+        ``vda_option``, reuses them and only redoes the exposure arithmetic.
+        The cache is keyed on each frame's identity, length, first / last
+        dates (states / triggers for the summary) and the amount and exempt
+        totals, so rows appended, dropped or re-flagged in place are picked up.
         """
+        if sales_df is None and nexus_summary is None:
+            if self._inputs is None:
+                raise ValueError("sales_df and nexus_summary are required on the first call.")
+            sales_df, nexus_summary = self._inputs
+        elif sales_df is None or nexus_summary is None:
+            raise ValueError("Pass both sales_df and nexus_summary, or neither to reuse the last inputs.")
+
         # ── early exits ──────────────────────────────────────────
         if sales_df.empty:
             logging.warning("Sales DataFrame is empty. No exposure calculated.")
@@ -102,208 +322,101 @@ class ExposureCalculator:
             logging.warning("Nexus summary is empty. No exposure calculated.")
             return pd.DataFrame()
 
-        # ── normalise sales index / month_year ──────────────────
-        # Ensure sales index is DatetimeIndex
-        if not isinstance(sales_df.index, pd.DatetimeIndex):
-            if "invoice_date" in sales_df.columns:
-                # Coerce 'invoice_date' to datetime and set as index
-                # Use .copy() to avoid SettingWithCopyWarning if sales_df is a slice
-                sales_df = sales_df.copy()
-                sales_df["invoice_date"] = pd.to_datetime(sales_df["invoice_date"])
-                sales_df = sales_df.set_index("invoice_date")
-            else:
-                raise TypeError(
-                    "Sales DataFrame must contain 'invoice_date' column if index is not a DatetimeIndex."
-                )
-
-        # Ensure 'month_year' column exists and is Period[M] based on the (now confirmed) DatetimeIndex
-        # This handles cases where month_year might be missing or not the correct dtype
-        if "month_year" not in sales_df.columns or not pd.api.types.is_period_dtype(
-            sales_df["month_year"]
-        ):
-             # Create or overwrite 'month_year' from the DatetimeIndex
-            sales_df["month_year"] = sales_df.index.to_period("M")
-
-
-        # ── validate / auto-coerce nexus_summary columns ────────
-        # auto-convert first_trigger_month to Period[M] if needed
-        if (
-            "first_trigger_month" in nexus_summary.columns
-            and not pd.api.types.is_period_dtype(nexus_summary["first_trigger_month"])
-        ):
-            logging.info("Coercing 'first_trigger_month' to Period[M] in nexus_summary.")
-            nexus_summary["first_trigger_month"] = pd.PeriodIndex(
-                pd.to_datetime(nexus_summary["first_trigger_month"]), freq="M"
-            )
-
-        # Validate required Period columns (now only first_trigger_month)
-        for col in ("first_trigger_month",):
-            if col not in nexus_summary.columns or not pd.api.types.is_period_dtype(
-                nexus_summary[col]
-            ):
-                raise TypeError(
-                    f"Nexus summary must contain PeriodIndex column '{col}'."
-                )
-
-        # store for possible downstream use
-        self.sales_df = sales_df
-        self.nexus_summary = nexus_summary
+        key = self._fingerprint(sales_df, nexus_summary)
+        if self._input_key != key:
+            self.sales_df, self.nexus_summary = self._normalise_inputs(sales_df, nexus_summary)
+            self._inputs, self._input_key = (sales_df, nexus_summary), key
+            # new inputs → drop the cached aggregates
+            self.__dict__.pop("monthly_taxable_sales", None)
+            self.__dict__.pop("first_triggers", None)
 
         logging.info("Calculating potential tax exposure...")
-        exposure_chunks: list[pd.DataFrame] = []
-        states_with_exposure: set[str] = set()
 
-        # filter taxable rows once
-        taxable_df = sales_df[~sales_df["is_exempt"]].copy()
-        if taxable_df.empty:
+        monthly_taxable = self.monthly_taxable_sales
+        if monthly_taxable.empty:
             logging.warning("No taxable (non-exempt) sales found.")
             return pd.DataFrame()
 
-        # first trigger per state
-        first_triggers = (
-            nexus_summary.loc[nexus_summary["first_trigger_month"].notna(), ["state", "first_trigger_month"]]
-            .drop_duplicates()
-            .loc[lambda d: d.groupby("state")["first_trigger_month"].idxmin()]
-            .set_index("state")
-        )
+        first_triggers = self.first_triggers
         if first_triggers.empty:
             logging.info("No states triggered nexus according to summary.")
             return pd.DataFrame()
 
-        # aggregate taxable sales by state × month
-        monthly_taxable = (
-            taxable_df
-            .groupby(["state", "month_year"])["total_amount"]
-            .sum()
-            .reset_index()
-            .rename(columns={"total_amount": "taxable_sales"})
-        )
-        if monthly_taxable.empty:
-            logging.warning("Monthly aggregation produced empty DataFrame.")
-            return pd.DataFrame()
-
         last_month: pd.Period = monthly_taxable["month_year"].max()
 
-        # ── iterate states ──────────────────────────────────────
-        for state, trig_row in first_triggers.iterrows():
-            params = self._get_state_params(state)
-            if params is None:
-                continue
-
-            try:
-                tax_rate = float(params.get("tax_rate"))
-                if tax_rate < 0:
-                    raise ValueError
-            except (TypeError, ValueError):
-                if self.error_collector:
-                    self.error_collector.add_warning(
-                        f"Invalid or missing tax_rate for {state}. Skipping."
-                    )
-                continue
-
-            # Start calculating exposure from the month *after* the trigger month
-            start_month = trig_row["first_trigger_month"] + 1
-            state_exposure = monthly_taxable[
-                (monthly_taxable["state"] == state)
-                & (monthly_taxable["month_year"] >= start_month)
-            ].copy()
-
-            if state_exposure.empty:
-                logging.info(f"No taxable sales found for {state} after trigger month.")
-                continue
-
-            states_with_exposure.add(state)
-            state_exposure["tax_rate"] = tax_rate
-            state_exposure["estimated_tax"] = state_exposure["taxable_sales"] * tax_rate
-
-            # ── VDA estimation ───────────────────────────────────
-            if self.vda_option == "Estimate":
-                # Get VDA parameters from config, with sensible defaults
-                vda_lookback = int(params.get("vda_lookback_cap", 36) or 36)
-                int_rate = float(params.get("vda_interest_rate", 0.05) or 0.05)
-                p_rate = float(params.get("standard_penalty_rate", 0.25) or 0.25)
-                penalty_waived = bool(params.get("vda_penalty_waived", True))
-
-                # Calculate the start month for VDA based on lookback from the last month in data
-                # Corrected: Subtract integer periods from Period object
-                vda_start = last_month - (vda_lookback - 1)
-
-
-                # Ensure month_year is Period dtype for calculations
-                if not pd.api.types.is_period_dtype(state_exposure["month_year"]):
-                    state_exposure["month_year"] = pd.PeriodIndex(
-                        state_exposure["month_year"], freq="M"
-                    )
-
-                # Calculate months late relative to the last month in the data
-                state_exposure["months_late"] = (
-                    (last_month.year - state_exposure["month_year"].dt.year) * 12
-                    + (last_month.month - state_exposure["month_year"].dt.month)
-                )
+        # ── attach trigger month + state parameters ─────────────
+        triggered = first_triggers.join(self.params, how="left")
 
-                # Calculate full interest and penalty
-                state_exposure["full_interest"] = state_exposure.apply(
-                    lambda r: self._calculate_interest(r["estimated_tax"], int_rate, r["months_late"]),
-                    axis=1,
-                )
-                state_exposure["full_penalty"] = state_exposure["estimated_tax"] * p_rate
-                state_exposure["full_liability"] = (
-                    state_exposure["estimated_tax"]
-                    + state_exposure["full_interest"]
-                    + state_exposure["full_penalty"]
-                )
+        unconfigured = triggered.index.difference(self.params.index)
+        if len(unconfigured) and self.error_collector:
+            self.error_collector.add_warning(
+                f"No configuration found for state(s) {list(unconfigured)}. Skipping."
+            )
+        invalid_rate = triggered.index[
+            triggered.index.isin(self.params.index) & ~(triggered["tax_rate"] >= 0)
+        ]
+        if len(invalid_rate) and self.error_collector:
+            self.error_collector.add_warning(
+                f"Invalid or missing tax_rate for {list(invalid_rate)}. Skipping."
+            )
+        triggered = triggered[triggered["tax_rate"] >= 0]
+
+        # Exposure starts the month *after* the trigger month
+        exposure_df = monthly_taxable.merge(triggered, left_on="state", right_index=True)
+        exposure_df = exposure_df[
+            exposure_df["month_year"] > exposure_df["first_trigger_month"]
+        ].reset_index(drop=True)
+
+        no_sales = triggered.index.difference(exposure_df["state"].unique())
+        if len(no_sales):
+            logging.info("No taxable sales found after trigger month for: %s", list(no_sales))
+        if exposure_df.empty:
+            logging.warning("No exposure calculated after processing triggered states.")
+            return pd.DataFrame()
 
-                # Calculate VDA specific amounts (tax, interest, penalty)
-                state_exposure["vda_tax"] = state_exposure["estimated_tax"].where(
-                    state_exposure["month_year"] >= vda_start, 0
-                )
-                # Interest is only calculated for months within the VDA lookback period
-                state_exposure["vda_interest"] = state_exposure.apply(
-                    lambda r: self._calculate_interest(
-                        r["vda_tax"], int_rate, r["months_late"]
-                    )
-                    if r["month_year"] >= vda_start # Apply interest only if within VDA period
-                    else 0,
-                    axis=1,
-                )
+        states_with_exposure = set(exposure_df["state"].unique())
+        exposure_df["estimated_tax"] = exposure_df["taxable_sales"] * exposure_df["tax_rate"]
+
+        # ── VDA estimation ───────────────────────────────────────
+        if self.vda_option == "Estimate":
+            # Period[M] ordinals are months since epoch, so month arithmetic is
+            # plain integer subtraction
+            month_ord = exposure_df["month_year"].array.asi8
+
+            # Calculate months late relative to the last month in the data
+            months_late = np.clip(last_month.ordinal - month_ord, 0, None).astype(np.int16)
+
+            # VDA window: the last ``vda_lookback_cap`` months of data, per state
+            vda_start = last_month.ordinal - (exposure_df["vda_lookback_cap"].to_numpy() - 1)
+            in_vda = month_ord >= vda_start
+
+            # Simple monthly interest; a negative configured rate accrues nothing
+            monthly_rate = np.clip(exposure_df["vda_interest_rate"].to_numpy(dtype=float), 0, None) / 12.0
+            amounts = _vda_kernel()(
+                exposure_df["estimated_tax"].to_numpy(dtype=float),
+                months_late,
+                in_vda,
+                monthly_rate,
+                exposure_df["standard_penalty_rate"].to_numpy(dtype=float),
                 # Penalty may be waived based on config
-                state_exposure["vda_penalty"] = (
-                    state_exposure["vda_tax"] * p_rate * (0 if penalty_waived else 1)
-                )
-                state_exposure["vda_liability"] = (
-                    state_exposure["vda_tax"]
-                    + state_exposure["vda_interest"]
-                    + state_exposure["vda_penalty"]
-                )
-                state_exposure["estimated_vda_savings"] = (
-                    state_exposure["full_liability"] - state_exposure["vda_liability"]
-                )
-
-                # Drop the temporary 'months_late' column
-                state_exposure.drop(columns="months_late", inplace=True)
-
-            exposure_chunks.append(state_exposure)
+                exposure_df["vda_penalty_waived"].to_numpy(dtype=bool),
+            )
+            exposure_df = exposure_df.assign(**dict(zip(VDA_COLUMNS, amounts)))
 
-        # ── consolidate ─────────────────────────────────────────
-        if not exposure_chunks:
-            logging.warning("No exposure calculated after processing triggered states.")
-            return pd.DataFrame()
+        # keep tax_rate; the remaining parameters were only inputs
+        exposure_df = exposure_df.drop(
+            columns=["first_trigger_month", *(c for c in PARAM_DEFAULTS if c != "tax_rate")]
+        )
 
-        exposure_df = pd.concat(exposure_chunks, ignore_index=True)
-
-        # guarantee VDA columns exist, even if VDA wasn't estimated (fill with 0.0)
-        for col in (
-            "full_interest",
-            "full_penalty",
-            "full_liability",
-            "vda_tax",
-            "vda_interest",
-            "vda_penalty",
-            "vda_liability",
-            "estimated_vda_savings",
-        ):
-            if col not in exposure_df.columns:
-                exposure_df[col] = 0.0
+        # guarantee VDA columns exist, even if VDA wasn't estimated (fill with 0.0);
+        # added in one concat rather than one block insert per column
+        missing = [col for col in VDA_COLUMNS if col not in exposure_df.columns]
+        if missing:
+            exposure_df = pd.concat(
+                [exposure_df, pd.DataFrame(0.0, index=exposure_df.index, columns=missing)],
+                axis=1,
+                copy=False,
+            )
 
         if self.error_collector:
             self.error_collector.update_summary(
@@ -2,24 +2,95 @@
 """Data ingestion module for Economic-Nexus project."""
 
 from __future__ import annotations
+import csv
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Union, Sequence
+from typing import List, Dict, Tuple, Union, Sequence
 
 import pandas as pd
-from .utils import ErrorCollector
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pacsv
+from .utils import ErrorCollector, table_from_pandas
+
+# -- optional native Excel reader --
+# calamine (Rust) decodes xlsx far faster than openpyxl; it skips cell
+# formatting, which this pipeline never reads. pandas gained the engine in 2.2.
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = "calamine" if tuple(map(int, pd.__version__.split(".")[:2])) >= (2, 2) else "openpyxl"
+except ImportError:
+    EXCEL_ENGINE = "openpyxl"
 
 # -- knobs --
 ONE_SHOT_LIMIT = int(os.getenv("MAX_ONESHOT_BYTES", 100 * 1024 * 1024))
-CHUNK_SIZE     = int(os.getenv("CSV_CHUNKSIZE",      100_000))
+BLOCK_SIZE     = int(os.getenv("CSV_BLOCK_BYTES",   8 << 20))
+# Files read concurrently; each CSV read also uses Arrow's own thread pool
+READ_WORKERS   = max(1, int(os.getenv("NEXUS_READ_WORKERS", max(1, (os.cpu_count() or 2) // 2))))
+# float32 halves the amount column's footprint but keeps only ~7 significant
+# digits: cents are exact below ~$100k per value, and monthly sums can drift
+# by dollars, which matters right at a $100k/$500k threshold. Opt-in only.
+AMOUNT_DTYPE   = os.getenv("NEXUS_AMOUNT_DTYPE", "float64").strip().lower()
+if AMOUNT_DTYPE not in {"float32", "float64"}:
+    raise ValueError(f"NEXUS_AMOUNT_DTYPE must be 'float32' or 'float64', not {AMOUNT_DTYPE!r}")
 
 DTYPE_MAP: Dict[str, str] = {
     "invoice_number": "string",
-    "total_amount":   "float64",
+    "total_amount":   AMOUNT_DTYPE,
     "zip_code":       "string",
 }
 
+# Arrow types for every loaded table. Columns not listed here are read as
+# strings: block-wise inference could otherwise settle on a type (e.g. null)
+# that a later block contradicts, and tables from several files must agree
+# on one schema to be concatenated.
+ARROW_TYPES: Dict[str, pa.DataType] = {
+    col: pa.string() if dt == "string" else pa.from_numpy_dtype(dt) for col, dt in DTYPE_MAP.items()
+}
+
+# Date columns are parsed by Arrow while loading. Like pandas, one format is
+# inferred per column from its first value and applied strictly; entries that
+# don't match become null (NaT).
+DATE_COLUMNS = ("date", "invoice_date")
+TIMESTAMP_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%m/%d/%Y")
+
+# Flag columns are read as text and mapped to booleans after loading, so an
+# unexpected spelling nulls that one entry instead of failing the whole file.
+# Spellings are matched case-insensitively after trimming whitespace.
+FLAG_COLUMNS = ("is_exempt",)
+TRUE_VALUES  = ("true", "t", "yes", "y", "x", "1", "1.0")
+FALSE_VALUES = ("false", "f", "no", "n", "0", "0.0")
+
+
+def _to_pandas(table: pa.Table) -> pd.DataFrame:
+    """
+    Arrow table → DataFrame, keeping string columns Arrow-backed.
+
+    ``string[pyarrow]`` columns reuse the Arrow buffers instead of building
+    one Python str object per cell, which is most of the conversion cost.
+    """
+    return table.to_pandas(
+        types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get,
+        self_destruct=True,
+        split_blocks=True,
+    )
+
+
+def _csv_header(path: Path) -> List[str]:
+    """Column names from the first line of a CSV, without decoding any data."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return next(csv.reader(f), [])
+
+
+def _concat_tables(tables: List[pa.Table]) -> pa.Table:
+    try:
+        return pa.concat_tables(tables, promote_options="default")
+    except TypeError:  # pyarrow < 14
+        return pa.concat_tables(tables, promote=True)
+
+
 class DataLoader:
     """Load one or many CSV / Excel extracts and return a validated DataFrame."""
 
@@ -42,82 +113,174 @@ class DataLoader:
             "street_address","city","state","zip_code","sales_channel",
         ]
         self.optional_columns = ["is_exempt","taxability_code","customer_id"]
+        # Columns the pipeline reads; any others in an extract are never parsed
+        self.wanted_columns = frozenset(self.required_columns + self.optional_columns + ["channel", "month_year"])
         logging.info("DataLoader initialised for %s file(s)", len(self.file_paths))
 
     # -- public --
     def load_data(self) -> pd.DataFrame:
-        frames: List[pd.DataFrame] = []
+        tables: List[pa.Table] = []
         total_rows = 0
 
+        paths = []
         for path in self.file_paths:
             if not path.exists():
                 self._warn(f"Input file not found: {path}. Skipping."); continue
-            try:
-                df = self._read_file(path)
-            except Exception as exc:
-                self._warn(f"Error reading {path.name}: {exc}. Skipping.", exc_info=True); continue
-            if df.empty:
+            paths.append(path)
+
+        # Files are independent and Arrow parses without the GIL, so several
+        # extracts are read at once; results still come back in input order
+        workers = min(len(paths), READ_WORKERS)
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(self._try_read_file, paths))
+        else:
+            results = [self._try_read_file(path) for path in paths]
+
+        for path, (table, exc) in zip(paths, results):
+            if exc is not None:
+                self._warn(f"Error reading {path.name}: {exc}. Skipping.", exc_info=exc); continue
+            if table is None or table.num_rows == 0:
                 self._warn(f"{path.name} produced 0 rows after validation. Skipping."); continue
-            total_rows += len(df); frames.append(df)
-            logging.info("✓ %s rows accepted from %s", len(df), path.name)
+            total_rows += table.num_rows; tables.append(table)
+            logging.info("✓ %s rows accepted from %s", table.num_rows, path.name)
 
         if self.error_collector:
             self.error_collector.update_summary("total_rows_input", total_rows)
 
-        if not frames:
+        if not tables:
             self._warn("No valid data loaded. Returning empty DataFrame.")
             # Return an empty DataFrame with all potential columns for consistency
             return pd.DataFrame(columns=self.required_columns + self.optional_columns)
 
-        return pd.concat(frames, ignore_index=True)
+        # Arrow concat appends chunks without copying; pandas is built once
+        combined = _concat_tables(tables)
+        del tables
+        return _to_pandas(combined)
 
     # -- internals --
-    def _read_file(self, path: Path) -> pd.DataFrame:
+    def _try_read_file(self, path: Path) -> Tuple[pa.Table | None, Exception | None]:
+        try:
+            return self._read_file(path), None
+        except Exception as exc:
+            return None, exc
+
+    def _read_file(self, path: Path) -> pa.Table | None:
         if path.suffix.lower() == ".csv":    return self._read_csv(path)
-        if path.suffix.lower() in {".xlsx",".xls"}: return self._read_excel(path)
+        if path.suffix.lower() in {".xlsx",".xls"}: return self._postprocess_table(self._read_excel(path), path.name)
         raise ValueError(f"Unsupported file extension: {path.suffix}")
 
-    def _read_csv(self, path: Path) -> pd.DataFrame:
+    def _read_csv(self, path: Path) -> pa.Table | None:
+        header = _csv_header(path)
+        names = [c.lower().strip() for c in header]
+
+        # Reject before any data is decoded
+        present = frozenset(names)
+        missing = [c for c in self.required_columns if c not in present]
+        if missing:
+            self._warn(f"{path.name} missing required columns: {missing}. Rejecting."); return None
+
+        keep = [(raw, name) for raw, name in zip(header, names) if name in self.wanted_columns]
+        convert_options = pacsv.ConvertOptions(
+            column_types={raw: ARROW_TYPES.get(name, pa.string()) for raw, name in keep},
+            include_columns=[raw for raw, _ in keep],
+            strings_can_be_null=True,  # empty fields are missing, as with pandas.read_csv
+        )
         if path.stat().st_size <= ONE_SHOT_LIMIT:
-            df = pd.read_csv(path, low_memory=False, dtype=DTYPE_MAP, engine="pyarrow")
-            return self._postprocess(df, path.name)
-        chunks = pd.read_csv(path, chunksize=CHUNK_SIZE, dtype=DTYPE_MAP, engine="pyarrow")
-        return pd.concat((self._postprocess(c, path.name) for c in chunks), ignore_index=True)
+            table = pacsv.read_csv(path, convert_options=convert_options)
+        else:
+            # Large file: decode block by block; read_all gathers the batches
+            # into one table in C++, with no per-chunk DataFrame or concat
+            table = pacsv.open_csv(
+                path,
+                read_options=pacsv.ReadOptions(block_size=BLOCK_SIZE),
+                convert_options=convert_options,
+            ).read_all()
+        return self._postprocess_table(table, path.name)
 
-    @staticmethod
-    def _read_excel(path: Path) -> pd.DataFrame:
+    def _read_excel(self, path: Path) -> pa.Table:
         # Note: dtype is applied here, but might need adjustment for specific Excel nuances
-        return pd.read_excel(path, engine="openpyxl", dtype=DTYPE_MAP or None)
+        return table_from_pandas(pd.read_excel(
+            path,
+            engine=EXCEL_ENGINE,
+            dtype=DTYPE_MAP or None,
+            usecols=lambda c: str(c).lower().strip() in self.wanted_columns,
+        ))
 
-    def _postprocess(self, df: pd.DataFrame, source_name: str = "<inline>") -> pd.DataFrame:
+    def _postprocess_table(self, table: pa.Table, source_name: str = "<inline>") -> pa.Table | None:
         """
-        Applies basic cleaning (lowercase/strip columns) and validates required columns.
-        Renames 'sales_channel' to 'channel' if present.
+        Normalises column names, validates required columns, renames
+        'sales_channel' to 'channel', casts every column to its ``ARROW_TYPES``
+        type (string by default), parses ``DATE_COLUMNS`` and maps
+        ``FLAG_COLUMNS`` to booleans.
         """
-        original_columns = df.columns.tolist() # Keep original column names for the check
+        names = [c.lower().strip() for c in table.column_names]
+        present = frozenset(names)
+        missing = [c for c in self.required_columns if c not in present]
+        if missing:
+            self._warn(f"{source_name} missing required columns: {missing}. Rejecting."); return None
 
-        # Lower-case and strip column names
-        df.columns = df.columns.str.lower().str.strip()
+        if "sales_channel" in names and "channel" not in names:
+            names[names.index("sales_channel")] = "channel"
+        table = table.rename_columns(names)
+        table = table.cast(pa.schema([
+            (n, table.schema.field(n).type if n in DATE_COLUMNS and pa.types.is_timestamp(table.schema.field(n).type)
+             else ARROW_TYPES.get(n, pa.string()))
+            for n in names
+        ]))
+        for col in DATE_COLUMNS:
+            if col in names:
+                table = table.set_column(names.index(col), col, self._parse_dates(table[col], col, source_name))
+        for col in FLAG_COLUMNS:
+            if col in names:
+                table = table.set_column(names.index(col), col, self._parse_flags(table[col], col, source_name))
+        return table
 
-        # Check for missing required columns *before* renaming 'sales_channel'
-        # We check against the lower/stripped column names
-        missing = [c for c in self.required_columns if c not in df.columns]
-        if missing:
-            self._warn(f"{source_name} missing required columns: {missing}. Rejecting."); return pd.DataFrame()
+    def _parse_dates(self, values: pa.ChunkedArray, col: str, source_name: str) -> pa.ChunkedArray:
+        """String dates → timestamp[ns], warning about entries that fail to parse."""
+        if pa.types.is_timestamp(values.type):  # already typed, e.g. Excel date cells
+            return values.cast(pa.timestamp("ns"))
+
+        first = values.drop_null()
+        first = first[0].as_py() if len(first) else None
+        fmt = next(
+            (f for f in TIMESTAMP_FORMATS
+             if first is not None and pc.strptime(first, format=f, unit="ns", error_is_null=True).is_valid),
+            None,
+        )
+        if fmt is not None:
+            parsed = pc.strptime(values, format=fmt, unit="ns", error_is_null=True)
+        else:  # empty column, or a format Arrow doesn't know: let pandas infer
+            parsed = pa.chunked_array([pa.array(pd.to_datetime(values.to_pandas(), errors="coerce"), pa.timestamp("ns"))])
 
-        # Rename legacy column -> canonical 'channel' *after* the missing check
-        if "sales_channel" in df.columns and "channel" not in df.columns:
-            df.rename(columns={"sales_channel":"channel"}, inplace=True)
+        failed = parsed.null_count - values.null_count
+        if failed > 0:
+            self._warn(f"{source_name}: {failed} entries in column '{col}' could not be parsed as dates and were set to NaT.")
+        return parsed
 
-        # dtype coercion - apply to columns that exist in the DataFrame
-        if DTYPE_MAP:
-            # Filter DTYPE_MAP to only include columns present in the DataFrame
-            dtype_map_present = {k: v for k, v in DTYPE_MAP.items() if k in df.columns}
-            if dtype_map_present:
-                 df = df.astype(dtype_map_present, errors="ignore")
+    def _parse_flags(self, values: pa.ChunkedArray, col: str, source_name: str) -> pa.ChunkedArray:
+        """Yes/no text → bool; spellings outside ``TRUE_VALUES`` / ``FALSE_VALUES`` become null, with a warning."""
+        text = pc.utf8_lower(pc.utf8_trim_whitespace(values))
+        parsed = pc.if_else(
+            pc.is_in(text, value_set=pa.array(TRUE_VALUES)), True,
+            pc.if_else(pc.is_in(text, value_set=pa.array(FALSE_VALUES)), False, pa.scalar(None, pa.bool_())),
+        )
+        failed = parsed.null_count - values.null_count
+        if failed > 0:
+            self._warn(f"{source_name}: {failed} entries in column '{col}' are not a recognised yes/no value and were set to null.")
+        return parsed
 
-        return df
+    def _postprocess(self, df: pd.DataFrame, source_name: str = "<inline>") -> pd.DataFrame:
+        """
+        pandas entry point to ``_postprocess_table``: same column clean-up,
+        validation, rename and typing, done as Arrow casts. Returns an empty
+        DataFrame when required columns are missing.
+        """
+        table = self._postprocess_table(table_from_pandas(df), source_name)
+        if table is None:
+            return pd.DataFrame()
+        return _to_pandas(table)
 
-    def _warn(self, msg: str, *, exc_info: bool=False) -> None:
+    def _warn(self, msg: str, *, exc_info: bool | BaseException = False) -> None:
         if self.error_collector: self.error_collector.add_warning(msg)
         logging.warning(msg, exc_info=exc_info)
@@ -10,17 +10,20 @@ DataFrame with a `first_trigger_month` column.
 from __future__ import annotations
 
 import logging
+from functools import cached_property
 from typing import Dict, Any
 
+import numpy as np
 import pandas as pd
 
+from .utils import frame_fingerprint
 # Changed import from absolute (src.agg_utils) to relative (.agg_utils)
 from .agg_utils import (
     monthly_state_summary,
     add_rolling_12m,
     add_calendar_year_metrics,
     evaluate_thresholds,
-    MARKETPLACE_CHANNELS,  # parsed once inside agg_utils
+    marketplace_mask,  # MARKETPLACE_CHANNELS parsed once inside agg_utils
 )
 
 logger = logging.getLogger(__name__)
@@ -42,6 +45,95 @@ class NexusAnalyzer:
                                   'transaction_threshold': None}``
         """
         self.state_config = state_config
+        # (input frame fingerprint, its monthly metrics): nothing before
+        # threshold evaluation depends on the config, so repeat calls reuse it.
+        # Only the fingerprint is kept, not the input frame itself.
+        self._monthly: tuple[tuple, pd.DataFrame] | None = None
+
+    @property
+    def state_config(self) -> Dict[str, Dict[str, Any]]:
+        return self._state_config
+
+    @state_config.setter
+    def state_config(self, state_config: Dict[str, Dict[str, Any]]) -> None:
+        # Assign a new config (rather than editing the dict in place) to
+        # re-run with other thresholds; the rules table is rebuilt from it
+        self._state_config = state_config
+        self.__dict__.pop("_threshold_table", None)
+
+    @cached_property
+    def _threshold_table(self) -> pd.DataFrame:
+        """
+        One row per configured state: lookback rule and numeric thresholds (NaN = unset).
+
+        Built on first use and kept for later ``analyze_nexus`` calls until
+        ``state_config`` is reassigned.
+        """
+        table = pd.DataFrame.from_dict(
+            {
+                state: {
+                    "lookback_rule": cfg.get("lookback_rule") or "rolling_12m",
+                    "sales_threshold": cfg.get("sales_threshold"),
+                    "transaction_threshold": cfg.get("transaction_threshold"),
+                }
+                for state, cfg in self.state_config.items()
+                if cfg is not None
+            },
+            orient="index",
+            columns=["lookback_rule", "sales_threshold", "transaction_threshold"],
+        )
+        # A handful of distinct rules across ~50 states: categorical codes let
+        # evaluate_thresholds pick rows by integer compare. Thresholds stay
+        # float64 since NaN marks an unset one and float32 would blur a
+        # fractional threshold.
+        table["lookback_rule"] = table["lookback_rule"].astype("category")
+        for col in ("sales_threshold", "transaction_threshold"):
+            table[col] = pd.to_numeric(table[col], errors="coerce").astype("float64")
+        return table
+
+    @staticmethod
+    def _fingerprint(df_raw: pd.DataFrame) -> tuple:
+        """Cache key for ``df_raw``: identity, length, first / last dates and the amount total."""
+        return frame_fingerprint(df_raw, edge_cols=("invoice_date", "month_year"), sum_cols=("total_amount",))
+
+    @staticmethod
+    def _monthly_metrics(df_raw: pd.DataFrame) -> pd.DataFrame:
+        """Monthly sales / transaction totals and every lookback base, per state."""
+        # --- Pre‑processing ---------------------------------------------
+        # df_raw is only read. The aggregation needs four columns, so only
+        # those go on a working frame (sharing df_raw's arrays); the filter
+        # below then copies four columns rather than every one.
+        if "month_year" not in df_raw.columns and "invoice_date" not in df_raw.columns:
+            # If month_year is missing and no invoice_date, raise error
+            raise ValueError("Input DataFrame must contain 'month_year' or 'invoice_date' column.")
+        needed = ["state", "total_amount", "invoice_number", "month_year"]
+        if "month_year" in df_raw.columns and not isinstance(df_raw["month_year"].dtype, pd.PeriodDtype):
+            needed.append("invoice_date")  # monthly_state_summary rebuilds month_year from it
+        df = pd.DataFrame({c: df_raw[c] for c in needed if c in df_raw.columns}, copy=False)
+
+        # Ensure we have a period column
+        if "month_year" not in df.columns:
+            # Create month_year from invoice_date;
+            # to_datetime is a no-op when the loader already parsed the dates
+            df["month_year"] = pd.to_datetime(df_raw["invoice_date"]).dt.to_period("M")
+
+        # Filter marketplace channels *if* your rules exclude them.
+        # This filtering should happen *before* aggregation.
+        if "channel" in df_raw.columns:
+            df = df.loc[~marketplace_mask(df_raw["channel"])]
+
+        # --- 1. Monthly aggregation -------------------------------------
+        # This function returns a DataFrame with a MultiIndex ['state', 'month_year']
+        df_m = monthly_state_summary(df)
+
+        # --- 2. Rolling 12‑month totals ---------------------------------
+        # This function expects a DataFrame with a MultiIndex ['state', 'month_year']
+        df_m = add_rolling_12m(df_m)
+
+        # --- 3. Calendar‑year helpers -----------------------------------
+        # This function expects a DataFrame with a MultiIndex ['state', 'month_year'] and 'cy' column
+        df_m = add_calendar_year_metrics(df_m)
+        return df_m
 
     # --------------------------------------------------------------------- #
     # Main API                                                            #
@@ -63,91 +155,63 @@ class NexusAnalyzer:
         DataFrame
             Monthly metrics + ``sales_met``, ``txn_met`` flags and
             ``first_trigger_month`` for each state.
-        """
-
-        # --- Pre‑processing ---------------------------------------------
-        df = df_raw.copy()
-
-        # Ensure we have a period column
-        if "month_year" not in df.columns:
-            # Attempt to create month_year from invoice_date if it exists
-            if "invoice_date" in df.columns:
-                 # Ensure invoice_date is datetime first
-                 df["invoice_date"] = pd.to_datetime(df["invoice_date"])
-                 df["month_year"] = df["invoice_date"].dt.to_period("M")
-            else:
-                 # If month_year is missing and no invoice_date, raise error
-                 raise ValueError("Input DataFrame must contain 'month_year' or 'invoice_date' column.")
 
+        The monthly aggregation is cached for the last ``df_raw`` seen, so
+        calling again with the same frame only re-evaluates thresholds. The
+        cache is keyed on the frame's identity, length, first / last dates and
+        amount total, so appending, dropping or re-pricing rows in place is
+        picked up.
+        """
 
-        # Filter marketplace channels *if* your rules exclude them.
-        # This filtering should happen *before* aggregation.
-        if "channel" in df.columns:
-            df = df.loc[~df["channel"].str.upper().isin(MARKETPLACE_CHANNELS)]
-
-        # --- 1. Monthly aggregation -------------------------------------
-        # This function returns a DataFrame with a MultiIndex ['state', 'month_year']
-        df_m = monthly_state_summary(df)
-
-        # --- 2. Rolling 12‑month totals ---------------------------------
-        # This function expects a DataFrame with a MultiIndex ['state', 'month_year']
-        df_m = add_rolling_12m(df_m)
+        # --- 1-3. Monthly metrics, kept while df_raw is unchanged -------
+        key = self._fingerprint(df_raw)
+        if self._monthly is None or self._monthly[0] != key:
+            self._monthly = (key, self._monthly_metrics(df_raw))
+        df_m = self._monthly[1]
 
-        # --- 3. Calendar‑year helpers -----------------------------------
-        # This function expects a DataFrame with a MultiIndex ['state', 'month_year'] and 'cy' column
-        df_m = add_calendar_year_metrics(df_m)
+        # --- 4. Threshold evaluation, all states at once ----------------
+        rules = self._threshold_table
+        states = df_m.index.get_level_values("state")
+        configured = states.isin(rules.index)
+        for state in states[~configured].unique():
+            logger.warning("No config found for state %s; skipping threshold evaluation.", state)
 
-        # --- 4. Threshold evaluation per state --------------------------
-        results = []
-        # Iterate through each unique state in the monthly aggregated data
-        for state in df_m.index.get_level_values("state").unique():
-            # Select the data slice for the current state
-            slice_ = df_m.loc[state].copy()
-
-            # Get the configuration for the current state
-            cfg = self.state_config.get(state)
-            if cfg is None:
-                logger.warning("No config found for state %s; skipping threshold evaluation.", state)
-                continue
-
-            # Evaluate thresholds for the state's data slice
-            evaluated_slice = evaluate_thresholds(
-                slice_,
-                cfg.get("lookback_rule", "rolling_12m"), # Use rule from config or default
-                cfg.get("sales_threshold"),
-                cfg.get("transaction_threshold"),
-            )
-            # The evaluate_thresholds function returns a DataFrame with the same index as the input slice
-            # Add the state back as a column for concatenation later
-            evaluated_slice["state"] = state
-            results.append(evaluated_slice)
-
-        # Concatenate the results from all states
-        if not results:
+        if not configured.any():
             # If no states were processed (e.g., due to missing config), handle this case
             logger.warning("No states were processed for threshold evaluation.")
             # Return an empty DataFrame with expected columns
             return pd.DataFrame(columns=["state", "month_year", "sales_met", "txn_met", "first_trigger_month"])
 
+        df_m = df_m[configured]
+        # Broadcast each state's rule and thresholds onto its monthly rows:
+        # looked up once per distinct state, then spread by the index codes
+        state_codes = df_m.index.codes[0]
+        row_rules = rules.reindex(df_m.index.levels[0]).take(state_codes)
+        evaluated = evaluate_thresholds(
+            df_m,
+            row_rules["lookback_rule"].array,
+            row_rules["sales_threshold"].to_numpy(),
+            row_rules["transaction_threshold"].to_numpy(),
+        )
 
-        # Concatenate results and reset the index to flatten it
-        df_out = pd.concat(results).reset_index()
+        # One frame straight from the evaluated columns and index levels, rather
+        # than reset_index() copying every metric column only to drop it.
+        # Column order matches the previous per-state concat.
+        df_out = pd.DataFrame({
+            "month_year": evaluated.index.get_level_values("month_year"),
+            "sales_met": evaluated["sales_met"].to_numpy(),
+            "txn_met": evaluated["txn_met"].to_numpy(),
+            "state": evaluated.index.get_level_values("state"),
+        })
 
         # --- 5. Determine first trigger month ---------------------------
-        # Identify months where either sales or transaction threshold was met
-        triggered_months = df_out.loc[df_out["sales_met"] | df_out["txn_met"]]
-
-        # Group by state and find the minimum (earliest) month_year for each state that triggered
-        first_hit = (
-             triggered_months
-            .groupby("state")["month_year"]
-            .min()
-            .rename("first_trigger_month") # Rename the resulting Series to 'first_trigger_month'
-        )
-
-        # Merge the first_trigger_month back into the main output DataFrame
-        # Use a left merge to keep all months in df_out, adding first_trigger_month where available
-        df_out = df_out.merge(first_hit, on="state", how="left")
+        # Rows are sorted by (state, month), so a state's first triggered row
+        # is its earliest; states that never triggered get NaT
+        hit_rows = np.flatnonzero(df_out["sales_met"].to_numpy() | df_out["txn_met"].to_numpy())
+        hit_states, first = np.unique(state_codes[hit_rows], return_index=True)
+        first_ord = np.full(len(df_m.index.levels[0]), pd.NaT.value, dtype=np.int64)
+        first_ord[hit_states] = df_out["month_year"].array.asi8[hit_rows[first]]
+        df_out["first_trigger_month"] = pd.arrays.PeriodArray(first_ord[state_codes], dtype=pd.PeriodDtype("M"))
 
         logger.info("Nexus analysis complete.")
         return df_out
@@ -1,9 +1,14 @@
 # src/reporting.py
 import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pacsv
+import io
 import os
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill, NamedStyle
 from openpyxl.utils import get_column_letter
@@ -13,7 +18,41 @@ from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from reportlab.lib.units import inch
 from reportlab.lib import colors
-from .utils import ErrorCollector
+from .utils import ErrorCollector, table_from_pandas
+
+# -- optional fast JSON encoder --
+# orjson serialises datetimes and numpy scalars in C; the stdlib encoder is
+# the fallback (both stringify anything else via default=str)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _write_csv(df: pd.DataFrame, path: str) -> None:
+    """
+    Write ``df`` (without its index) as CSV through Arrow's C++ CSV writer.
+
+    The output is standard RFC 4180 CSV, but not byte-identical to
+    ``df.to_csv``: Arrow quotes the header and every string field, writes
+    booleans as ``true`` / ``false`` and drops a float's trailing ``.0``.
+    Mixed-type object columns are stringified first (missing values kept),
+    and whole-second timestamps are written without a nanosecond suffix.
+    Anything Arrow can't convert or write (e.g. an extension dtype it has no
+    type for) falls back to pandas' own ``to_csv``.
+    """
+    try:
+        table = table_from_pandas(df)
+        for i, field in enumerate(table.schema):
+            if pa.types.is_timestamp(field.type):
+                try:
+                    table = table.set_column(i, field.name, table[i].cast(pa.timestamp("s")))
+                except pa.ArrowInvalid:  # sub-second values: keep full precision
+                    pass
+        pacsv.write_csv(table, path)
+    except (pa.ArrowException, TypeError, ValueError) as e:
+        logging.warning(f"Arrow CSV writer failed for {path} ({e}); writing with pandas instead.")
+        df.to_csv(path, index=False, encoding='utf-8')
 
 class ReportGenerator:
     """Generates client-ready Excel and PDF reports, plus error/summary files."""
@@ -33,6 +72,14 @@ class ReportGenerator:
         self.error_collector = error_collector
         self.output_dir = output_dir
         self.logo_path = logo_path
+        # Read once; the Excel and PDF reports each decode from these bytes
+        self._logo_bytes = None
+        if logo_path and os.path.exists(logo_path):
+            try:
+                with open(logo_path, 'rb') as f:
+                    self._logo_bytes = f.read()
+            except OSError as e:
+                logging.warning(f"Could not read logo file {logo_path}: {e}")
         self.timestamp = pd.Timestamp.now().strftime('%Y%m%d_%H%M%S') # Include time for uniqueness
         # Use timestamp from error_collector if available for consistency
         if hasattr(error_collector, 'summary') and 'start_time' in error_collector.summary:
@@ -42,48 +89,118 @@ class ReportGenerator:
         os.makedirs(self.output_dir, exist_ok=True)
         logging.info(f"ReportGenerator initialized. Output directory: {self.output_dir}")
 
-    def _apply_excel_styles(self, ws):
-        """Applies basic formatting to an Excel worksheet."""
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
-        center_alignment = Alignment(horizontal="center", vertical="center")
-        left_alignment = Alignment(horizontal="left", vertical="center")
+    def _apply_excel_styles(self, wb: Workbook) -> None:
+        """Registers the header and data-cell named styles on ``wb``."""
         thin_border = Border(left=Side(style='thin'), right=Side(style='thin'),
                            top=Side(style='thin'), bottom=Side(style='thin'))
-
-        # Style header row
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = center_alignment
-            cell.border = thin_border
-
-        # Auto-adjust column widths and apply borders/alignment to data rows
-        for col_idx, column_cells in enumerate(ws.columns):
-            max_length = 0
-            column_letter = get_column_letter(column_cells[0].column)
-
-            # Calculate max width needed
-            for cell in column_cells:
-                if cell.value:
-                    cell_length = len(str(cell.value))
-                    if cell_length > max_length:
-                        max_length = cell_length
-                # Apply border and alignment to data cells (skip header)
-                if cell.row > 1:
-                    cell.border = thin_border
-                    # Align numeric columns to the right? Check dtype if needed.
-                    # For simplicity, left-align all data for now.
-                    cell.alignment = left_alignment
-
+        left_alignment = Alignment(horizontal="left", vertical="center")
+        wb.add_named_style(NamedStyle(
+            name="header_style",
+            font=Font(bold=True, color="FFFFFF"),
+            fill=PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid"),
+            alignment=Alignment(horizontal="center", vertical="center"),
+            border=thin_border,
+        ))
+        wb.add_named_style(NamedStyle(name="data_style", border=thin_border, alignment=left_alignment))
+        wb.add_named_style(NamedStyle(name="data_date_style", border=thin_border, alignment=left_alignment,
+                                      number_format="YYYY-MM-DD"))
+        wb.add_named_style(NamedStyle(name="data_month_style", border=thin_border, alignment=left_alignment,
+                                      number_format="YYYY-MM"))
+
+    def _write_data_sheet(self, wb: Workbook, sheet_name: str, df: pd.DataFrame) -> None:
+        """
+        Streams ``df`` into a new write-only sheet: styled header, then one
+        row per record. Rows are serialised as they are appended, so no
+        per-cell objects are kept for the whole sheet.
+        """
+        ws = wb.create_sheet(sheet_name)
+
+        # Monthly Periods are written as real dates (first of the month) shown
+        # as YYYY-MM, so they sort and filter as dates in Excel. The shallow
+        # copy leaves the caller's frame untouched.
+        styles = [
+            "data_month_style" if dtype == pd.PeriodDtype("M")
+            else "data_date_style" if isinstance(dtype, pd.PeriodDtype) or pd.api.types.is_datetime64_any_dtype(dtype)
+            else "data_style"
+            for dtype in df.dtypes
+        ]
+        period_cols = [col for col, dtype in df.dtypes.items() if isinstance(dtype, pd.PeriodDtype)]
+        if period_cols:
+            df = df.copy(deep=False)
+            for col in period_cols:
+                df[col] = df[col].dt.to_timestamp()
+
+        # Widths and frozen header go out with the sheet preamble, i.e.
+        # before the first row. Lengths come from the frame, missing values skipped.
+        for col_idx, (col_name, values) in enumerate(df.items(), start=1):
+            values = values[values.notna()]
+            max_length = max(len(str(col_name)), int(values.astype(str).str.len().max()) if len(values) else 0)
             adjusted_width = (max_length + 2) * 1.2 # Add padding
-            ws.column_dimensions[column_letter].width = min(adjusted_width, 60) # Limit max width
-
+            ws.column_dimensions[get_column_letter(col_idx)].width = min(adjusted_width, 60) # Limit max width
+        ws.freeze_panes = 'A2'
+
+        header = []
+        for col_name in df.columns:
+            cell = WriteOnlyCell(ws, value=str(col_name))
+            cell.style = "header_style"
+            header.append(cell)
+        ws.append(header)
+
+        # One styled cell per column, refilled for every row: the sheet writes a
+        # row out on append, and reusing the cells skips re-applying the style
+        cells = []
+        for style in styles:
+            cell = WriteOnlyCell(ws)
+            cell.style = style
+            cells.append(cell)
+        values = df.astype(object).where(df.notna(), None)  # NaN / NaT / NA -> empty cell
+        for record in values.itertuples(index=False, name=None):
+            for cell, value in zip(cells, record):
+                cell.value = value
+            ws.append(cells)
+
+    def _write_cover_sheet(self, wb: Workbook) -> None:
+        """Title, client, report date, run summary and optional logo."""
+        ws_cover = wb.create_sheet("Cover")
+        # Set column widths for cover sheet
+        ws_cover.column_dimensions['B'].width = 30
+        ws_cover.column_dimensions['C'].width = 30
+
+        def bold(value, size=None):
+            cell = WriteOnlyCell(ws_cover, value=value)
+            cell.font = Font(size=size, bold=True)
+            return cell
+
+        ws_cover.append([])
+        ws_cover.append([None, bold("SALT Economic Nexus Analysis", size=16)])
+        ws_cover.append([])
+        ws_cover.append([None, "Client:", self.client_name])
+        ws_cover.append([None, "Report Date:", pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')])
+        ws_cover.append([])
+        # Add Summary Stats
+        summary = self.error_collector.get_summary()
+        ws_cover.append([None, bold("Run Summary:")])
+        for key, value in summary.items():
+            if key not in ['start_time', 'end_time', 'warnings']: # Exclude raw lists/timestamps
+                ws_cover.append([None, f"{key.replace('_', ' ').title()}:",
+                                 value if not isinstance(value, list) else len(value)])
+        # Add Logo
+        if self._logo_bytes:
+             try:
+                 img = OpenpyxlImage(io.BytesIO(self._logo_bytes))
+                 img.height = 75 # Adjust size as needed
+                 img.width = 150
+                 ws_cover.add_image(img, 'E2')
+             except Exception as e:
+                 logging.warning(f"Could not embed logo in Excel: {e}")
 
     def generate_excel_report(self, data_dict: dict):
         """
         Generates a multi-sheet Excel report with improved formatting.
 
+        The workbook is write-only: each data sheet is streamed row by row
+        and saved without holding every cell in memory.
+
         Args:
             data_dict (dict): A dictionary where keys are sheet names and values are DataFrames.
         """
@@ -91,66 +208,27 @@ class ReportGenerator:
         logging.info(f"Generating Excel report: {excel_path}")
 
         try:
-            with pd.ExcelWriter(excel_path, engine='openpyxl',
-                                datetime_format='YYYY-MM-DD',
-                                date_format='YYYY-MM-DD') as writer:
-                wb = writer.book
-                first_sheet = True
-
-                # --- Cover Sheet ---
-                ws_cover = wb.create_sheet("Cover", 0) # Insert as first sheet
-                ws_cover['B2'] = "SALT Economic Nexus Analysis"
-                ws_cover['B2'].font = Font(size=16, bold=True)
-                ws_cover['B4'] = f"Client:"
-                ws_cover['C4'] = self.client_name
-                ws_cover['B5'] = f"Report Date:"
-                ws_cover['C5'] = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
-                # Add Summary Stats
-                summary = self.error_collector.get_summary()
-                ws_cover['B7'] = "Run Summary:"
-                ws_cover['B7'].font = Font(bold=True)
-                row = 8
-                for key, value in summary.items():
-                    if key not in ['start_time', 'end_time', 'warnings']: # Exclude raw lists/timestamps
-                        ws_cover[f'B{row}'] = f"{key.replace('_', ' ').title()}:"
-                        ws_cover[f'C{row}'] = value if not isinstance(value, list) else len(value)
-                        row += 1
-                # Add Logo
-                if self.logo_path and os.path.exists(self.logo_path):
-                     try:
-                         img = OpenpyxlImage(self.logo_path)
-                         img.height = 75 # Adjust size as needed
-                         img.width = 150
-                         ws_cover.add_image(img, 'E2')
-                     except Exception as e:
-                         logging.warning(f"Could not embed logo in Excel: {e}")
-                # Set column widths for cover sheet
-                ws_cover.column_dimensions['B'].width = 30
-                ws_cover.column_dimensions['C'].width = 30
-
-                # --- Data Sheets ---
-                for sheet_name, df_orig in data_dict.items():
-                    if isinstance(df_orig, pd.DataFrame) and not df_orig.empty:
-                        logging.debug(f"Writing sheet: {sheet_name}")
-                        # Convert Period columns to string for Excel compatibility
-                        df = df_orig.copy()
-                        for col in df.select_dtypes(include=['period']).columns:
-                             df[col] = df[col].astype(str)
-
-                        df.to_excel(writer, sheet_name=sheet_name, index=False, startrow=0)
-                        ws = writer.sheets[sheet_name]
-                        self._apply_excel_styles(ws)
-                        # Freeze top row
-                        ws.freeze_panes = 'A2'
-
-                    elif isinstance(df_orig, pd.DataFrame) and df_orig.empty:
-                         logging.info(f"Skipping empty DataFrame for sheet: {sheet_name}")
-                         # Create an empty sheet with a note
-                         ws = wb.create_sheet(sheet_name)
-                         ws['A1'] = "No data available for this section."
-                    else:
-                         logging.warning(f"Item for sheet '{sheet_name}' is not a DataFrame or is invalid. Skipping.")
-
+            wb = Workbook(write_only=True)
+            self._apply_excel_styles(wb)
+
+            # --- Cover Sheet ---
+            self._write_cover_sheet(wb)
+
+            # --- Data Sheets ---
+            for sheet_name, df_orig in data_dict.items():
+                if isinstance(df_orig, pd.DataFrame) and not df_orig.empty:
+                    logging.debug(f"Writing sheet: {sheet_name}")
+                    self._write_data_sheet(wb, sheet_name, df_orig)
+
+                elif isinstance(df_orig, pd.DataFrame) and df_orig.empty:
+                     logging.info(f"Skipping empty DataFrame for sheet: {sheet_name}")
+                     # Create an empty sheet with a note
+                     ws = wb.create_sheet(sheet_name)
+                     ws.append(["No data available for this section."])
+                else:
+                     logging.warning(f"Item for sheet '{sheet_name}' is not a DataFrame or is invalid. Skipping.")
+
+            wb.save(excel_path)
             logging.info("Excel report generated successfully.")
 
         except Exception as e:
@@ -171,9 +249,9 @@ class ReportGenerator:
 
             # --- PDF Cover Page Elements ---
             # Logo
-            if self.logo_path and os.path.exists(self.logo_path):
+            if self._logo_bytes:
                 try:
-                    img = ReportlabImage(self.logo_path, width=2*inch, height=1*inch)
+                    img = ReportlabImage(io.BytesIO(self._logo_bytes), width=2*inch, height=1*inch)
                     img.hAlign = 'LEFT'
                     story.append(img)
                     story.append(Spacer(1, 0.3*inch))
@@ -235,7 +313,7 @@ class ReportGenerator:
         reject_path = os.path.join(self.output_dir, reject_filename)
         if not reject_df.empty:
             try:
-                reject_df.to_csv(reject_path, index=False, encoding='utf-8')
+                _write_csv(reject_df, reject_path)
                 logging.info(f"Rejected rows report saved to: {reject_path} ({len(reject_df)} rows)")
             except Exception as e:
                 logging.error(f"Failed to save rejected rows report: {e}", exc_info=True)
@@ -250,9 +328,14 @@ class ReportGenerator:
         summary_filename = f"run_summary_{self.timestamp}.json"
         summary_path = os.path.join(self.output_dir, summary_filename)
         try:
-            with open(summary_path, 'w', encoding='utf-8') as f:
-                # Use default=str for any non-standard JSON types (though finalize converts times)
-                json.dump(summary_data, f, indent=4, default=str)
+            # Use default=str for any non-standard JSON types (though finalize converts times)
+            if orjson is not None:
+                with open(summary_path, 'wb') as f:
+                    f.write(orjson.dumps(summary_data, default=str,
+                                         option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+            else:
+                with open(summary_path, 'w', encoding='utf-8') as f:
+                    json.dump(summary_data, f, indent=4, default=str)
             logging.info(f"Run summary report saved to: {summary_path}")
         except Exception as e:
             logging.error(f"Failed to save run summary report: {e}", exc_info=True)
@@ -261,16 +344,14 @@ class ReportGenerator:
     def generate_all_reports(self, data_dict: dict, pdf_summary: str = None):
         """Generates all standard reports: Excel, PDF (optional), Error/Summary."""
         logging.info("Starting generation of all reports...")
-        # Generate main data report first
-        self.generate_excel_report(data_dict)
-
-        # Generate optional PDF
-        if pdf_summary:
-            self.generate_pdf_report(summary_text=pdf_summary)
-        else:
-             # Generate a default simple PDF cover even if no specific text given
-             self.generate_pdf_report()
-
+        # Excel and PDF are independent (both only read the summary), so
+        # they are built side by side; each logs its own failures
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            excel = pool.submit(self.generate_excel_report, data_dict)
+            # Generate a default simple PDF cover even if no specific text given
+            pdf = (pool.submit(self.generate_pdf_report, summary_text=pdf_summary) if pdf_summary
+                   else pool.submit(self.generate_pdf_report))
+            excel.result(); pdf.result()
 
         # Always generate error/summary files last, after finalize_summary is called
         self.generate_error_reports()
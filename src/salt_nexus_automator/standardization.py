@@ -1,23 +1,67 @@
 # src/standardization.py
 import pandas as pd
-import usaddress # For basic parsing, part of usaddress-scourgify typically
 import logging
 from .utils import ErrorCollector
 import numpy as np
+import pyarrow as pa
+
+# USPS codes: the 50 states, DC, and the territories and military "states"
+# an address may carry
+US_STATE_CODES = frozenset({
+    "AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DE", "FL", "GA", "HI", "ID", "IL",
+    "IN", "IA", "KS", "KY", "LA", "ME", "MD", "MA", "MI", "MN", "MS", "MO", "MT",
+    "NE", "NV", "NH", "NJ", "NM", "NY", "NC", "ND", "OH", "OK", "OR", "PA", "RI",
+    "SC", "SD", "TN", "TX", "UT", "VT", "VA", "WA", "WV", "WI", "WY",
+    "DC", "PR", "VI", "GU", "AS", "MP", "AA", "AE", "AP",
+})
+
+
+def _safe_tag_address(address):
+    """usaddress classification of one address; None for non-strings or empty strings."""
+    if not isinstance(address, str) or not address:
+        return None
+    import usaddress  # For basic parsing, part of usaddress-scourgify typically; loaded on first use
+    try:
+        tagged_address, address_type = usaddress.tag(address)
+        # Could return tagged_address dict or just the type, etc.
+        return address_type # Example: return the classified type
+    except Exception as e:
+        # logging.debug(f"usaddress tagging failed for address: {address} - Error: {e}")
+        return "Untaggable" # Indicate failure
+
+
+def tag_address_types(addresses: pd.Series) -> pd.Series:
+    """
+    ``_safe_tag_address`` for every entry of ``addresses``.
+
+    Customers repeat, so each distinct address is tagged once and the
+    results are gathered back by factorized code (missing -> None).
+    """
+    codes, uniques = pd.factorize(addresses)
+    types = np.array([_safe_tag_address(a) for a in uniques] + [None], dtype=object)
+    return pd.Series(types[codes], index=addresses.index, name="address_type_usaddress")
+
 
 class DataStandardizer:
     """Cleans, standardizes types, validates, and prepares sales data."""
 
-    def __init__(self, df: pd.DataFrame, error_collector: ErrorCollector):
+    def __init__(self, df: pd.DataFrame, error_collector: ErrorCollector, tag_addresses: bool = False):
         """
         Initializes the DataStandardizer.
 
         Args:
             df (pd.DataFrame): Raw data loaded from ingestion.
             error_collector (ErrorCollector): Instance for collecting errors/warnings.
+            tag_addresses (bool): Add an informational ``address_type_usaddress``
+                column in ``clean_addresses``. Off by default: nothing downstream
+                reads it.
         """
-        self.df = df.copy() # Work on a copy
+        # Shallow copy: every step replaces whole columns (or rows, via dropna)
+        # rather than writing into them, so the caller's frame is left as is
+        # without duplicating its data up front
+        self.df = df.copy(deep=False)
         self.error_collector = error_collector
+        self.tag_addresses = tag_addresses
         logging.info(f"DataStandardizer initialized with {len(self.df)} rows.")
 
     def standardize_dates(self, date_cols: list = ['date', 'invoice_date']) -> None:
@@ -25,11 +69,14 @@ class DataStandardizer:
         logging.info(f"Standardizing date columns: {date_cols}...")
         for col in date_cols:
             if col in self.df.columns:
-                original_nan_count = self.df[col].isna().sum()
+                if pd.api.types.is_datetime64_any_dtype(self.df[col]):
+                    continue  # already parsed (e.g. by DataLoader): nothing can fail
+                was_missing = self.df[col].isna().to_numpy()
                 # Try converting, coercing errors. Handle mixed types gracefully.
                 self.df[col] = pd.to_datetime(self.df[col], errors='coerce')
-                current_nan_count = self.df[col].isna().sum()
-                failed_parses = current_nan_count - original_nan_count
+                # One mask per side, combined in NumPy: only entries that were
+                # present before the parse count as failures
+                failed_parses = int(np.count_nonzero(self.df[col].isna().to_numpy() & ~was_missing))
 
                 if failed_parses > 0:
                     msg = f"{failed_parses} entries in column '{col}' could not be parsed as dates and were set to NaT."
@@ -42,46 +89,57 @@ class DataStandardizer:
             else:
                  logging.warning(f"Date column '{col}' not found in DataFrame. Skipping standardization.")
 
+    @staticmethod
+    def _to_numeric(values: pd.Series) -> pd.Series:
+        """
+        ``pd.to_numeric(values, errors='coerce')``; Arrow-backed text is first
+        tried as one Arrow cast, which parses in C++ rather than per cell.
+        """
+        if pd.api.types.is_numeric_dtype(values):
+            return values  # e.g. typed by DataLoader: nothing to parse
+        if isinstance(values.dtype, (pd.StringDtype, pd.ArrowDtype)):
+            try:
+                parsed = pa.array(values.array).cast(pa.float64())
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                # unparseable entries (or padding Arrow won't accept): coerce them
+                # per cell, as plain float64 like the fast path rather than Float64
+                values = values.astype(object)
+            else:
+                return pd.Series(parsed.to_numpy(zero_copy_only=False), index=values.index, name=values.name)
+        return pd.to_numeric(values, errors='coerce')
+
     def clean_addresses(self) -> None:
         """Standardizes address fields using basic cleaning and optionally usaddress."""
         logging.info("Standardizing address fields (street, city, state, zip)...")
         address_cols = ['street_address', 'city', 'state', 'zip_code']
         for col in address_cols:
             if col in self.df.columns:
-                # Basic cleaning: Convert to string, strip whitespace
-                self.df[col] = self.df[col].fillna('').astype(str).str.strip()
+                # Basic cleaning: Convert to string, strip whitespace. Arrow-backed
+                # strings keep this to Arrow's UTF-8 kernels, with no str objects
+                self.df[col] = self.df[col].astype("string[pyarrow]").fillna('').str.strip()
                 if col == 'state':
                     self.df[col] = self.df[col].str.upper()
-                    # Basic validation: Ensure state is 2 letters (can be enhanced)
-                    state_mask = (self.df[col].str.len() != 2) & (self.df[col] != '')
-                    invalid_states = self.df.loc[state_mask, col].unique()
+                    # Basic validation: flag anything that isn't a USPS code; the
+                    # few distinct values are checked, not every row
+                    invalid_states = [v for v in self.df[col].unique() if v != '' and v not in US_STATE_CODES]
                     if len(invalid_states) > 0:
                         msg = f"Found potentially invalid state abbreviations: {list(invalid_states)}. Review data."
                         self.error_collector.add_warning(msg)
                 if col == 'zip_code':
-                    # Extract ZIP5 more robustly, handle non-string cases
-                    self.df[col] = self.df[col].str.extract(r'^(\d{5})', expand=False).fillna('')
+                    # ZIP5 = the first five characters when they are all digits;
+                    # slice / isdigit run as Arrow kernels rather than a regex per row
+                    first5 = self.df[col].str.slice(0, 5)
+                    valid = (first5.str.len() == 5) & first5.str.isdigit()
+                    self.df[col] = first5.where(valid, '')
 
         # Apply usaddress parsing (MVP: basic usage for potential future use/validation)
         # Note: This library primarily tags components. Actual cleaning/standardization might need more rules.
         # Wrap in try-except as it can fail on very malformed strings.
-        # Consider making this step optional via config due to performance implications.
-        if 'street_address' in self.df.columns:
+        # Optional (tag_addresses) due to performance implications.
+        if self.tag_addresses and 'street_address' in self.df.columns:
              logging.info("Applying basic usaddress tagging (informational)...")
-             # Define a function to safely tag addresses
-             def safe_tag_address(address):
-                 if not isinstance(address, str) or not address:
-                     return None # Return None for non-strings or empty strings
-                 try:
-                     tagged_address, address_type = usaddress.tag(address)
-                     # Could return tagged_address dict or just the type, etc.
-                     return address_type # Example: return the classified type
-                 except Exception as e:
-                     # logging.debug(f"usaddress tagging failed for address: {address} - Error: {e}")
-                     return "Untaggable" # Indicate failure
-
              # Apply the tagging (this creates a new column, doesn't modify original)
-             # self.df['address_type_usaddress'] = self.df['street_address'].apply(safe_tag_address)
+             self.df['address_type_usaddress'] = tag_address_types(self.df['street_address'])
              logging.info("Basic usaddress tagging step completed.")
         logging.info("Address field standardization complete.")
 
@@ -92,26 +150,25 @@ class DataStandardizer:
 
         # total_amount: Convert to numeric, reject failures
         if 'total_amount' in self.df.columns:
-            original_nan_count = self.df['total_amount'].isna().sum()
-            self.df['total_amount'] = pd.to_numeric(self.df['total_amount'], errors='coerce')
-            nan_mask = self.df['total_amount'].isna()
-            failed_numeric_indices = self.df.index[nan_mask & (self.df['total_amount'].isna().sum() > original_nan_count)]
+            amounts = self._to_numeric(self.df['total_amount'])
+            # Failed = missing now but not before; failed rows keep NaN so they
+            # are dropped later
+            failed = amounts.isna().to_numpy() & self.df['total_amount'].notna().to_numpy()
 
-            if not failed_numeric_indices.empty:
-                 msg = f"{len(failed_numeric_indices)} entries in 'total_amount' could not be converted to numeric."
+            if failed.any():
+                 msg = f"{int(failed.sum())} entries in 'total_amount' could not be converted to numeric."
                  self.error_collector.add_warning(msg)
-                 for index in failed_numeric_indices:
-                     self.error_collector.add_rejected_row(self.df.loc[index].to_dict(), "Invalid numeric format in 'total_amount'")
-                 # Set failed rows' amount to NaN to allow dropping later if needed
-                 self.df.loc[failed_numeric_indices, 'total_amount'] = np.nan
-
-        # invoice_number: Ensure it's a string
-        if 'invoice_number' in self.df.columns:
-            self.df['invoice_number'] = self.df['invoice_number'].fillna('').astype(str)
-
-        # customer_id (if present): Ensure string
-        if 'customer_id' in self.df.columns:
-            self.df['customer_id'] = self.df['customer_id'].fillna('').astype(str)
+                 # Rejected rows are taken before the conversion, so they show the bad value
+                 self.error_collector.add_rejected_rows(self.df.loc[failed], "Invalid numeric format in 'total_amount'")
+            self.df['total_amount'] = amounts
+
+        # invoice_number / customer_id (if present): Ensure string. The loader
+        # already delivers Arrow strings, so the cast is free and only the
+        # fill touches data; nothing is turned back into Python str objects.
+        for col in ('invoice_number', 'customer_id'):
+            if col in self.df.columns:
+                values = self.df[col].astype("string[pyarrow]")
+                self.df[col] = values.fillna('') if values.hasnans else values
 
         logging.info("Data type enforcement complete.")
 
@@ -122,20 +179,26 @@ class DataStandardizer:
 
         # Example: Check for duplicate invoice numbers (add warning, but don't reject by default)
         if 'invoice_number' in self.df.columns and not self.df['invoice_number'].empty:
-             # Exclude empty strings before checking duplicates
-             non_empty_invoices = self.df[self.df['invoice_number'] != '']
-             duplicates = non_empty_invoices[non_empty_invoices.duplicated(subset=['invoice_number'], keep=False)]
-             if not duplicates.empty:
-                 num_duplicates = duplicates['invoice_number'].nunique()
+             # Exclude empty strings before checking duplicates; count repeated
+             # keys from the invoice column alone, without slicing out rows
+             invoices = self.df['invoice_number']
+             codes, _ = pd.factorize(invoices[invoices != ''])
+             num_duplicates = int((np.bincount(codes[codes >= 0]) > 1).sum())
+             if num_duplicates:
                  msg = f"Found {num_duplicates} potentially duplicate invoice numbers (non-unique values exist). Review source data if uniqueness is expected."
                  self.error_collector.add_warning(msg)
 
         # Check for and drop rows with missing critical values AFTER standardization attempts
         critical_cols = ['date', 'total_amount', 'state', 'invoice_number']
         initial_rows = len(self.df)
-        # Also check for empty state strings
-        self.df.dropna(subset=critical_cols, inplace=True)
-        self.df = self.df[self.df['state'] != ''] # Remove rows with empty state after stripping
+        # Also check for empty state strings. Both conditions go into one keep
+        # mask, so the frame is sliced once
+        keep = np.logical_and.reduce(
+            [self.df[col].notna().to_numpy() for col in critical_cols]
+            + [(self.df['state'] != '').to_numpy(dtype=bool, na_value=False)]
+        )
+        if not keep.all():
+            self.df = self.df[keep]
 
         dropped_rows = initial_rows - len(self.df)
         if dropped_rows > 0:
@@ -148,6 +211,12 @@ class DataStandardizer:
 
         logging.info("Data validation checks complete.")
 
+    def encode_categoricals(self, cat_cols: tuple = ('state', 'channel', 'sales_channel')) -> None:
+        """Stores low-cardinality key columns as categoricals so groupbys hash int codes, not strings."""
+        for col in cat_cols:
+            if col in self.df.columns:
+                self.df[col] = self.df[col].astype('category')
+
 
     def standardize(self) -> pd.DataFrame:
         """
@@ -167,6 +236,7 @@ class DataStandardizer:
         self.clean_addresses()
         self.enforce_data_types() # This step now adds rejects for failed amount conversions
         self.validate_data()      # This step now drops rows with remaining critical NaNs/empty state
+        self.encode_categoricals()
 
         processed_rows = len(self.df)
         # Update summary - rows processed is count *after* standardization and dropping critical nulls
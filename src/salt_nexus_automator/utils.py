@@ -1,10 +1,13 @@
 # src/utils.py
 import json
 import yaml # PyYAML needed
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import logging
 import sys
 import os
+import time
 
 def setup_logging(log_level=logging.INFO, log_to_file=False, log_dir="output"):
     """Sets up basic logging to stdout and optionally to a file."""
@@ -53,13 +56,67 @@ def load_yaml_config(path: str) -> dict:
          logging.error(f"Configuration file format error: {e}")
          raise
 
+def table_from_pandas(df: pd.DataFrame) -> pa.Table:
+    """DataFrame → Arrow table, without the index."""
+    # Object columns may mix numbers and text (e.g. Excel cells); Arrow needs
+    # one type per column, so they are stringified with missing values kept
+    obj_cols = df.columns[df.dtypes == object]
+    if len(obj_cols):
+        df = df.assign(**{c: df[c].astype(str).where(df[c].notna(), None) for c in obj_cols})
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+def label_isin(values: pd.Series, targets, upper: bool = False) -> np.ndarray:
+    """
+    ``values.astype(str).isin(targets)`` for a column with repeated values.
+
+    Each distinct value is stringified (and upper-cased when ``upper``) and
+    looked up once, then broadcast back by its integer code (the categorical
+    codes, or a factorisation of other columns), so no row-length string
+    copy is built. Missing values never match.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, labels = pd.factorize(values)
+        labels = pd.Index(labels)
+    labels = labels.astype(str)
+    if upper:
+        labels = labels.str.upper()
+    # one trailing False slot so code -1 (missing) looks up "no match"
+    lookup = np.append(labels.isin(targets), False)
+    return lookup[codes]
+
+def frame_fingerprint(df: pd.DataFrame, edge_cols=(), sum_cols=()) -> tuple:
+    """
+    Cheap key for recognising a repeat call with the same, unmodified frame.
+
+    ``id``, length and column names, the first / last index label and the
+    first / last value of each of ``edge_cols``, and the total of each numeric
+    ``sum_cols`` column. Edges are compared as strings so NaT / NaN match
+    themselves. Costs one pass per summed column, far less than the work it
+    guards; in-place edits that keep every one of these the same go unnoticed.
+    """
+    key = [id(df), len(df), tuple(df.columns)]
+    if len(df):
+        key += [str(df.index[0]), str(df.index[-1])]
+        for col in edge_cols:
+            if col in df.columns:
+                key += [str(df[col].iat[0]), str(df[col].iat[-1])]
+    for col in sum_cols:
+        if col in df.columns and (pd.api.types.is_numeric_dtype(df[col]) or pd.api.types.is_bool_dtype(df[col])):
+            key.append(float(np.nansum(df[col].to_numpy(dtype="float64", na_value=np.nan))))
+    return tuple(key)
+
 class ErrorCollector:
     """Collects rejected rows and run summary information."""
     def __init__(self):
         self.rejected_rows = []
+        # Bulk rejects stay columnar: (len(rejected_rows) when added, frame)
+        self._rejected_batches = []
         self.warnings = []
+        self._seen_warnings = set() # O(1) duplicate check; self.warnings keeps the order
         self.summary = {
-            "start_time": pd.Timestamp.now(),
+            "start_time": None, # set by restart_clock()
             "end_time": None,
             "duration_seconds": None,
             "total_rows_input": 0,
@@ -70,8 +127,14 @@ class ErrorCollector:
             "warnings": [],
             "warnings_count": 0
         }
+        self.restart_clock()
         logging.info("ErrorCollector initialized.")
 
+    def restart_clock(self):
+        """Marks now as the run's start (wall-clock for display, monotonic for the duration)."""
+        self.summary["start_time"] = pd.Timestamp.now()
+        self._start_counter = time.perf_counter()
+
     def add_rejected_row(self, row_data: dict, reason: str):
         """Adds a row that failed validation."""
         # Ensure row_data is serializable (convert Period/Timestamp)
@@ -80,19 +143,48 @@ class ErrorCollector:
         self.rejected_rows.append(entry)
         self.summary['rows_rejected'] += 1
 
+    def add_rejected_rows(self, rows: pd.DataFrame, reason: str):
+        """
+        Adds every row of ``rows`` as failing validation for ``reason``.
+
+        Same entries as ``add_rejected_row`` per row, but Period / datetime
+        columns are stringified once per column instead of per value, and
+        the rows are kept as a frame rather than exploded into dicts.
+        """
+        if rows.empty:
+            return
+        rows = rows.copy(deep=False)
+        for col, dtype in rows.dtypes.items():
+            if isinstance(dtype, pd.PeriodDtype):
+                rows[col] = rows[col].astype(str).where(rows[col].notna(), rows[col].astype(object))
+            elif pd.api.types.is_datetime64_any_dtype(dtype):
+                rows[col] = rows[col].dt.strftime("%Y-%m-%d %H:%M:%S").astype(object).where(rows[col].notna(), pd.NaT)
+        rows["rejection_reason"] = reason
+        self._rejected_batches.append((len(self.rejected_rows), rows))
+        self.summary['rows_rejected'] += len(rows)
+
     def add_warning(self, message: str):
         """Adds a general warning."""
-        if message not in self.warnings: # Avoid duplicate warnings
+        if message not in self._seen_warnings: # Avoid duplicate warnings
+            self._seen_warnings.add(message)
             self.warnings.append(message)
             self.summary['warnings'].append(message)
             self.summary['warnings_count'] = len(self.warnings)
             logging.warning(message) # Also log warnings
 
     def get_rejected_rows_df(self) -> pd.DataFrame:
-        """Returns collected rejected rows as a DataFrame."""
-        if not self.rejected_rows:
+        """Returns collected rejected rows as a DataFrame, in the order they were added."""
+        if not self.rejected_rows and not self._rejected_batches:
             return pd.DataFrame()
-        return pd.DataFrame(self.rejected_rows)
+        parts, start = [], 0
+        for pos, frame in self._rejected_batches:
+            if pos > start:
+                parts.append(pd.DataFrame(self.rejected_rows[start:pos]))
+                start = pos
+            parts.append(frame)
+        if start < len(self.rejected_rows):
+            parts.append(pd.DataFrame(self.rejected_rows[start:]))
+        return pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0].reset_index(drop=True)
 
     def update_summary(self, key: str, value: any):
         """Updates a specific key in the summary dictionary."""
@@ -101,7 +193,7 @@ class ErrorCollector:
     def finalize_summary(self):
         """Calculates duration and finalizes summary."""
         self.summary["end_time"] = pd.Timestamp.now()
-        self.summary["duration_seconds"] = (self.summary["end_time"] - self.summary["start_time"]).total_seconds()
+        self.summary["duration_seconds"] = time.perf_counter() - self._start_counter
         logging.info(f"Run summary finalized. Duration: {self.summary['duration_seconds']:.2f}s")
 
 
@@ -3,8 +3,8 @@ import streamlit as st
 import pandas as pd
 import os
 import yaml # For state_config.yaml
-import json # For reading summary json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import time # For performance timing (optional)
 
@@ -39,6 +39,25 @@ def get_state_config(config_path):
         st.stop() # Halt execution if config fails
 state_config = get_state_config(CONFIG_FILE)
 
+# --- Cached Ingestion ---
+@st.cache_data(show_spinner=False) # Keyed on upload contents: re-runs that only change settings skip this
+def load_and_standardize(file_contents: tuple[bytes, ...], file_names: tuple[str, ...]):
+    """Load + standardize the uploaded sales files; returns the frame and the collector that saw it."""
+    import tempfile
+    error_collector = ErrorCollector()
+    with tempfile.TemporaryDirectory(prefix="temp_uploads_") as upload_dir:
+        def spill(name, content):
+            path = os.path.join(upload_dir, name)
+            with open(path, "wb") as f: f.write(content)
+            return path
+        # File writes release the GIL, so several uploads are spilled at once
+        with ThreadPoolExecutor(max_workers=min(8, max(1, len(file_names)))) as pool:
+            paths = list(pool.map(spill, file_names, file_contents))
+        raw_df = DataLoader(paths, error_collector).load_data()
+    error_collector.update_summary('total_rows_input', len(raw_df))
+    std_df = DataStandardizer(raw_df, error_collector).standardize()
+    return std_df, error_collector
+
 # --- Logo & Title ---
 logo_path = os.environ.get('REPORT_LOGO_PATH', None)
 if logo_path and os.path.exists(logo_path):
@@ -84,9 +103,6 @@ if run_button and uploaded_sales_files:
     log_box = st.empty() # Placeholder for log messages (optional advanced feature)
     logs = ["Starting analysis..."] # Simple list to store log messages
 
-    # Instantiate Error Collector for this run
-    error_collector = ErrorCollector()
-
     # Define output directory for this run
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     run_output_dir = os.path.join(DEFAULT_OUTPUT_DIR, f"run_{timestamp}")
@@ -96,37 +112,26 @@ if run_button and uploaded_sales_files:
         run_start_time = time.time()
 
         # --- Workflow Steps ---
-        # 1. Ingestion
-        status_text.text("Step 1/6: Loading data...")
-        logs.append("Loading data...")
+        # 1-2. Ingestion & Standardization (cached on the uploaded bytes)
+        status_text.text("Step 1/6: Loading and standardizing data...")
+        logs.append("Loading and standardizing data...")
         log_box.info("\n".join(logs))
-        # Save uploaded files temporarily
-        temp_sales_paths = []
         temp_exempt_path = None
         temp_dir = f"temp_uploads_{timestamp}"
         os.makedirs(temp_dir, exist_ok=True)
 
-        for uploaded_file in uploaded_sales_files:
-            path = os.path.join(temp_dir, uploaded_file.name)
-            with open(path, "wb") as f: f.write(uploaded_file.getbuffer())
-            temp_sales_paths.append(path)
-
         if uploaded_exemption_file:
             temp_exempt_path = os.path.join(temp_dir, uploaded_exemption_file.name)
             with open(temp_exempt_path, "wb") as f: f.write(uploaded_exemption_file.getbuffer())
             logs.append(f"Using supplemental exemption file: {uploaded_exemption_file.name}")
 
-        loader = DataLoader(temp_sales_paths, error_collector)
-        raw_df = loader.load_data()
-        error_collector.update_summary('total_rows_input', len(raw_df))
-        progress_bar.progress(10, text="Step 1/6: Data Loaded.")
-
-        # 2. Standardization
-        status_text.text("Step 2/6: Standardizing data...")
-        logs.append("Standardizing data...")
-        log_box.info("\n".join(logs))
-        standardizer = DataStandardizer(raw_df, error_collector)
-        std_df = standardizer.standardize()
+        # Streamlit hands back a fresh copy of the cached frame and collector;
+        # the collector carries ingest/standardize warnings and rejects into this run
+        std_df, error_collector = load_and_standardize(
+            tuple(f.getvalue() for f in uploaded_sales_files),
+            tuple(f.name for f in uploaded_sales_files),
+        )
+        error_collector.restart_clock() # Time this run, not the cached one
         progress_bar.progress(30, text="Step 2/6: Standardization Complete.")
 
         # 3. Nexus Analysis
@@ -183,25 +188,21 @@ if run_button and uploaded_sales_files:
 
         # --- Display Results ---
         st.subheader("📈 Run Summary")
-        summary_path = os.path.join(run_output_dir, f"run_summary_{reporter.timestamp}.json")
         reject_path = os.path.join(run_output_dir, f"rejected_rows_{reporter.timestamp}.csv")
 
-        summary_data = {}
-        if os.path.exists(summary_path):
-             with open(summary_path, 'r') as f: summary_data = json.load(f)
-             col1, col2, col3, col4 = st.columns(4)
-             col1.metric("Rows Input", summary_data.get('total_rows_input', 'N/A'))
-             col2.metric("Rows Processed", summary_data.get('rows_processed', 'N/A'))
-             col3.metric("Rows Rejected", summary_data.get('rows_rejected', 'N/A'))
-             col4.metric("Warnings", len(summary_data.get('warnings', [])))
-             st.metric("States Triggering Nexus", summary_data.get('nexus_triggers', 'N/A'))
-             st.metric("States with Potential Exposure", summary_data.get('states_with_exposure', 'N/A'))
-
-             if summary_data.get('warnings'):
-                 with st.expander("Show Warnings"):
-                     st.warning("\n".join(summary_data['warnings']))
-        else:
-             st.warning("Run summary file not found.")
+        # Same dict the reporter wrote to run_summary_*.json, taken from memory
+        summary_data = error_collector.get_summary()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Rows Input", summary_data.get('total_rows_input', 'N/A'))
+        col2.metric("Rows Processed", summary_data.get('rows_processed', 'N/A'))
+        col3.metric("Rows Rejected", summary_data.get('rows_rejected', 'N/A'))
+        col4.metric("Warnings", len(summary_data.get('warnings', [])))
+        st.metric("States Triggering Nexus", summary_data.get('nexus_triggers', 'N/A'))
+        st.metric("States with Potential Exposure", summary_data.get('states_with_exposure', 'N/A'))
+
+        if summary_data.get('warnings'):
+            with st.expander("Show Warnings"):
+                st.warning("\n".join(summary_data['warnings']))
 
         # Display Nexus Trigger Summary (unchanged)
         st.subheader("🔔 Nexus Trigger Summary")
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from salt_nexus_automator.exposure_calc import ExposureCalculator
+from salt_nexus_automator.nexus_analysis import NexusAnalyzer
+
+# Minimal configuration for a state
+CFG = {"CA": {"sales_threshold": 100000, "lookback_rule": "rolling_12m",
+              "tax_rate": 0.07}}
+
+# Months used by the fixtures, built once and reused so PeriodIndex takes the
+# Period ordinals as they are instead of parsing a string per element
+P_JAN, P_FEB, P_MAR = (pd.Period(m, freq="M") for m in ("2024-01", "2024-02", "2024-03"))
+
+# Built once per session. Both reuse cached results only while the input's
+# fingerprint (utils.frame_fingerprint) is unchanged, so sharing them across
+# tests is safe as long as no test changes their settings; tests that do
+# should build their own.
+@pytest.fixture(scope="session")
+def exposure_calc():
+    return ExposureCalculator(CFG, "Estimate", error_collector=None)
+
+@pytest.fixture(scope="session")
+def nexus_analyzer():
+    return NexusAnalyzer(CFG)          # should not raise
+
+# calculate_exposure / analyze_nexus neither copy nor modify their inputs, so
+# the frames are built once per session and shared without .copy(). Dates come
+# pre-typed, as DataLoader delivers them, so the callees have nothing to parse;
+# the other columns are typed arrays matching DataStandardizer's output dtypes.
+@pytest.fixture(scope="session")
+def sales():
+    # Sample sales data without a DatetimeIndex, but with 'invoice_date' and 'month_year'
+    return pd.DataFrame({
+        "invoice_date": pd.to_datetime(["2024-01-01", "2024-02-15", "2024-01-20"], format="%Y-%m-%d"),
+        # TX is a category with no rows, as left behind when the standardizer
+        # drops rows: groupbys must stay observed=True and not emit it
+        "state": pd.Categorical(["CA", "CA", "NY"], categories=["CA", "NY", "TX"]),
+        "channel": pd.Categorical(["DTC", "Marketplace", "DTC"], categories=["DTC", "Marketplace"]),
+        "total_amount": np.array([10, 25, 15], dtype=np.float64),
+        "invoice_number": ["X1", "Y2", "Z3"],
+        "month_year": pd.PeriodIndex([P_JAN, P_FEB, P_JAN], freq="M"),
+        "is_exempt": np.array([False, False, True]), # Include exempt sales
+    })
+
+@pytest.fixture(scope="session")
+def nexus_summary():
+    # Sample nexus summary data, trigger months as Period[M] like NexusAnalyzer's output
+    return pd.DataFrame({
+        "state": ["CA", "NY"],
+        "first_trigger_month": pd.PeriodIndex([P_JAN, P_MAR], freq="M"),
+        "sales_threshold_met": [True, False], # Example additional columns
+        "txns_threshold_met": [False, False],
+    })
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+from salt_nexus_automator.agg_utils import add_calendar_year_metrics
+
+pytestmark = pytest.mark.fast
+
+def test_prev_year_and_ytd_are_per_calendar_year():
+    # CA has sales in 2022 and 2023; NY skips 2022 entirely
+    idx = pd.MultiIndex.from_tuples(
+        [
+            ("CA", pd.Period("2022-11", "M")),
+            ("CA", pd.Period("2022-12", "M")),
+            ("CA", pd.Period("2023-01", "M")),
+            ("CA", pd.Period("2023-02", "M")),
+            ("NY", pd.Period("2021-06", "M")),
+            ("NY", pd.Period("2023-03", "M")),
+        ],
+        names=["state", "month_year"],
+    )
+    df_m = pd.DataFrame({"sales": [10.0, 20.0, 5.0, 7.0, 3.0, 4.0], "txns": [1, 2, 1, 1, 1, 1]}, index=idx)
+    df_m["cy"] = df_m.index.get_level_values("month_year").year.astype("int16")
+
+    out = add_calendar_year_metrics(df_m)
+
+    # 2021 is the first year in the data, so its previous year is unknown
+    assert np.isnan(out.loc[("NY", pd.Period("2021-06", "M")), "sales_prev_yr"])
+    # ...but CA's 2021 is covered by the data and simply had no sales
+    assert (out.loc["CA"].loc["2022", "sales_prev_yr"] == 0.0).all()
+    # 2023 rows see CA's 2022 total
+    assert out.loc[("CA", pd.Period("2023-02", "M")), "sales_prev_yr"] == 30.0
+    assert out.loc[("CA", pd.Period("2023-02", "M")), "txns_prev_yr"] == 3
+    # NY had no 2022 sales, which is a known zero, not a missing value
+    assert out.loc[("NY", pd.Period("2023-03", "M")), "sales_prev_yr"] == 0.0
+    # year-to-date restarts each January
+    np.testing.assert_allclose(out["sales_curr_ytd"], [10.0, 30.0, 5.0, 12.0, 3.0, 4.0])
@@ -1,7 +1,9 @@
 import pandas as pd
+import pytest
 from salt_nexus_automator.ingestion import DataLoader
-# Assuming ErrorCollector is available if needed for DataLoader
-# from .utils import ErrorCollector
+from salt_nexus_automator.utils import ErrorCollector
+
+pytestmark = pytest.mark.fast
 
 def test_sales_channel_renamed():
     # Added all required columns to the raw DataFrame for _postprocess validation
@@ -32,3 +34,26 @@ def test_sales_channel_renamed():
     assert "sales_channel" not in df_clean.columns
     # Assert that the DataFrame is not empty after processing
     assert not df_clean.empty
+
+def test_unrecognised_exempt_flag_nulls_entry_not_file():
+    df_raw = pd.DataFrame({
+        "date": ["2024-01-01"] * 3,
+        "invoice_date": ["2024-01-01"] * 3,
+        "invoice_number": ["INV-1", "INV-2", "INV-3"],
+        "total_amount": [100.0, 50.0, 25.0],
+        "customer_name": ["Test Customer"] * 3,
+        "street_address": ["123 Main St"] * 3,
+        "city": ["Anytown"] * 3,
+        "state": ["CA"] * 3,
+        "zip_code": ["90210"] * 3,
+        "sales_channel": ["Marketplace"] * 3,
+        "is_exempt": ["Yes", " n ", "maybe"],
+    })
+    ec = ErrorCollector()
+    df_clean = DataLoader("", error_collector=ec)._postprocess(df_raw, source_name="test_data")
+
+    # every row is kept; only the unknown spelling loses its flag
+    assert df_clean["is_exempt"].tolist() == [True, False, None]
+    assert ec.warnings == [
+        "test_data: 1 entries in column 'is_exempt' are not a recognised yes/no value and were set to null."
+    ]
@@ -0,0 +1,12 @@
+import numpy as np
+import pandas as pd
+from salt_nexus_automator.reporting import _write_csv
+
+def test_rejected_rows_csv_falls_back_to_pandas(tmp_path):
+    # complex values have no Arrow type, so the Arrow writer can't take this frame
+    df = pd.DataFrame({"invoice_number": ["X1", "Y2"], "odd": np.array([1 + 2j, 3j])})
+    path = tmp_path / "rejected.csv"
+
+    _write_csv(df, str(path))
+
+    assert path.read_text() == df.to_csv(index=False)
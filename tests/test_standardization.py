@@ -0,0 +1,23 @@
+import pandas as pd
+import pytest
+from salt_nexus_automator.standardization import DataStandardizer
+from salt_nexus_automator.utils import ErrorCollector
+
+pytestmark = pytest.mark.fast
+
+def test_only_unparseable_amounts_are_rejected():
+    ec = ErrorCollector()
+    df = pd.DataFrame({"total_amount": ["1.5", "abc", None, "3"], "invoice_number": ["a", "b", "c", "d"]})
+    std = DataStandardizer(df, ec)
+    std.enforce_data_types()
+
+    # the missing amount was never a number, so only "abc" is a rejection
+    assert ec.get_rejected_rows_df()["total_amount"].tolist() == ["abc"]
+    assert std.df["total_amount"].isna().tolist() == [False, True, True, False]
+
+def test_unknown_two_letter_state_is_flagged():
+    ec = ErrorCollector()
+    df = pd.DataFrame({"state": [" ca", "ZZ", "Calif", "", "pr"]})
+    DataStandardizer(df, ec).clean_addresses()
+
+    assert ec.warnings == ["Found potentially invalid state abbreviations: ['ZZ', 'CALIF']. Review data."]